@@ -14,6 +14,7 @@ OS_4X = None
 OS_8X = None
 FILTER_SIZE_3 = None
 ENABLE_GAS_MEAS = None
+DISABLE_GAS_MEAS = None
 
 # To speed up change increase RANDOM_CHANGE_LIMIT towards 100 when it will change readings every time they are
 # read, slow down change by decreasing RANDOM_CHANGE_LIMIT towards 0 when no change will occur
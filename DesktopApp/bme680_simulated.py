@@ -5,13 +5,34 @@
 # Date: Apr 2020
 
 # Imports
+import csv
 from time import sleep
 from machine import Pin
 from neopixel import NeoPixel
 from iot_app import IoTApp
 from bme680 import BME680, OS_2X, OS_4X, OS_8X, FILTER_SIZE_3, ENABLE_GAS_MEAS
-import pandas as pd
-import datetime
+import time
+
+# Temperature range shown on the NeoPixels, all blue at _TM_MIN and all red at _TM_MAX, the
+# reciprocal of the range is kept so the colour factor is a multiply rather than a divide
+_TM_MIN = 20.0
+_TM_MAX = 35.0
+_TM_RANGE_INV = 1.0 / (_TM_MAX - _TM_MIN)
+
+# Functions
+def temp_to_rb(tm):
+    """
+    Returns the (red, blue) NeoPixel colour channels for the supplied temperature, the
+    temperature is clamped to the _TM_MIN.._TM_MAX range, blue channel is maximum (255) at
+    _TM_MIN and red channel is maximum (255) at _TM_MAX
+    """
+    if tm < _TM_MIN:
+        tm = _TM_MIN
+    elif tm > _TM_MAX:
+        tm = _TM_MAX
+
+    tm_factor = (tm - _TM_MIN) * _TM_RANGE_INV
+    return int(255 * tm_factor), int(255 * (1 - tm_factor))
 
 # Classes
 class MainApp(IoTApp):
@@ -31,10 +52,25 @@ class MainApp(IoTApp):
     """
     def init(self):
         
-        timer = 0
-        self.timer = timer
-        df = pd.DataFrame( columns= ['Temperature', 'Pressure', 'Humidity'])
-        self.datapd= df
+        self.timer = 0
+        # Readings are written straight to the CSV file as they arrive, the file is opened once
+        # here (truncating any previous run) and closed in deinit(), nothing is kept in memory
+        self._csv_fh = open('Datapoints.csv', 'w', newline='')
+        self._csv = csv.writer(self._csv_fh)
+        self._csv.writerow(['Temperature', 'Pressure', 'Humidity'])
+
+        # Time the next reading is due, see the end of loop()
+        self._next_tick = time.monotonic()
+
+        # Readings (temperature, pressure, humidity, gas resistance) last shown on the OLED and the
+        # text built for each of the three OLED lines from them, no gas resistance reading (None)
+        # is shown as "stablising"
+        self._last_disp = (None, None, None, None)
+        self._oled_lines = ["", "", "stablising"]
+
+        # Last second the OLED time string was built for
+        self._last_sec = -1
+        self._time_str = ""
         
         """
         The init() method is designed to contain the part of the program that initialises
@@ -117,6 +153,17 @@ class MainApp(IoTApp):
         # for similarity reasons
         self.npm.write()
 
+        # Colour last filled into the NeoPixel matrix and last colour of the NeoPixel 0 indicator
+        self._last_rgb = (0, 0, 0)
+        self._last_indicator = None
+
+        # The BME680 readings are clamped to 20c..35c and only have two decimal places so there are
+        # just 1501 possible colours, work out the (red, blue) colour channels of each one now
+        # with temp_to_rb() rather than on every reading, the table is indexed by the temperature
+        # in hundredths of a degree offset from 20c
+        self._rgb_lut = [temp_to_rb(centi_tm / 100)
+                         for centi_tm in range(int(_TM_MIN * 100), int(_TM_MAX * 100) + 1)]
+
         self.target_indicator = "N"
         self.temperature_target = None
         self.pressure_target = None
@@ -125,53 +172,71 @@ class MainApp(IoTApp):
 
     def loop(self):
         
-        df = self.datapd
-        
         """
         The loop() method is called after the init() method and is designed to contain
         the part of the program which continues to execute until the finished property
         is set to True (which in the case of this implementation is when Button C on 
         the OLED FeatherWing is pressed)
         """
+        # Take local copies of the properties used throughout the loop, the timer is read here so
+        # it is always bound even when no sensor reading is available
+        sensor = self.sensor_bme680
+        npm = self.npm
+        timer = self.timer
+
         self.oled_clear()
 
         # If sensor readings are available, read them once a second or so
-        if self.sensor_bme680.get_sensor_data(temperature_target=self.temperature_target,
-                                              pressure_target=self.pressure_target,
-                                              humidity_target=self.humidity_target,
-                                              gas_resistance_target=self.gas_resistance_target):
-            tm_reading = self.sensor_bme680.data.temperature  # In degrees Celsius
-            pa_reading = self.sensor_bme680.data.pressure     # In Hectopascals (1 hPa = 100 Pascals)
-            rh_reading = self.sensor_bme680.data.humidity     # As a percentage (ie. relative humidity)
+        if sensor.get_sensor_data(temperature_target=self.temperature_target,
+                                  pressure_target=self.pressure_target,
+                                  humidity_target=self.humidity_target,
+                                  gas_resistance_target=self.gas_resistance_target):
+            data = sensor.data
+            tm_reading = data.temperature  # In degrees Celsius
+            pa_reading = data.pressure     # In Hectopascals (1 hPa = 100 Pascals)
+            rh_reading = data.humidity     # As a percentage (ie. relative humidity)
 
             # The VOC gas sensor needs a short time (around 20-30 milliseconds) to warm up,
             # until then output a message to state it is stablising, the gas reading is provided in
             # electrical resistance (ohms) measured across the sensor and is not very useful on its own,
             # it needs to be compared to previous readings to make any use of this value, it is included
             # here to show how to read it but you will not be directly using this data in the future
-            if self.sensor_bme680.data.heat_stable:
-                gr_reading = self.sensor_bme680.data.gas_resistance
+            if data.heat_stable:
+                gr_reading = data.gas_resistance
             else:
                 gr_reading = None
 
-            output = "{0:.2f}c, {1:.0f}hpa".format(tm_reading, pa_reading)
-            self.oled_text(output, 0, 0)
+            # Only format the text for an OLED line again when the readings displayed on it have
+            # changed since the previous loop, otherwise reuse the text built last time
+            lines = self._oled_lines
+            last_disp = self._last_disp
+
+            if tm_reading != last_disp[0] or pa_reading != last_disp[1]:
+                lines[0] = f"{tm_reading:.2f}c, {pa_reading:.0f}hpa"
+            self.oled_text(lines[0], 0, 0)
 
-            output = "{0:.2f}%rh".format(rh_reading)
-            self.oled_text(output, 0, 10)
+            if rh_reading != last_disp[2]:
+                lines[1] = f"{rh_reading:.2f}%rh"
+            self.oled_text(lines[1], 0, 10)
 
             # The VOC gas sensor needs a short time (aorund 20-30 milliseconds) to warm up,
             # until then output a message to state it is stablising
-            if gr_reading:
-                output = "{0:.0f}ohms".format(gr_reading)
-            else:
-                output = "stablising"
-            self.oled_text(output, 0, 20)
-            
-            ct = datetime.datetime.now()
+            if gr_reading != last_disp[3]:
+                if gr_reading:
+                    lines[2] = f"{gr_reading:.0f}ohms"
+                else:
+                    lines[2] = "stablising"
+            self.oled_text(lines[2], 0, 20)
+
+            self._last_disp = (tm_reading, pa_reading, rh_reading, gr_reading)
             
-            output = str(ct)
-        
+            # Only rebuild the time string when the second has changed, the OLED cannot show
+            # anything finer than that anyway
+            sec = int(time.time())
+            if sec != self._last_sec:
+                self._time_str = time.strftime("%H:%M:%S")
+                self._last_sec = sec
+            output = self._time_str
             
             self.oled_text(output, 80, 20)
 
@@ -186,57 +251,58 @@ class MainApp(IoTApp):
             # will only be a small change in temperature, make all blue NeoPixels equivalent to
             # a reading of 20c and all red NeoPixels equivalent to a reading of 35c, then set the
             # colour channels using the actual read temperature
-            min_tm = 20
-            max_tm = 35
 
-            # Clamp actual read temperature to minimum and maximum temperature range
-            if tm_reading < min_tm:
-                tm_reading = min_tm
-            elif tm_reading > max_tm:
-                tm_reading = max_tm
+            # Clamp actual read temperature to minimum and maximum temperature range, this is done
+            # here as well as in temp_to_rb() since the clamped reading is used to index the table
+            # built in init() and is also the temperature recorded in the CSV file below
+            if tm_reading < _TM_MIN:
+                tm_reading = _TM_MIN
+            elif tm_reading > _TM_MAX:
+                tm_reading = _TM_MAX
 
-            # Calculate the factor the actual temperature reading contributes to the colour channels
-            tm_factor = (tm_reading - min_tm) / (max_tm - min_tm)
-
-            # Blue channel is maximum (255) when actual temperature is at 20c, make sure this value
-            # ends up an integer
-            blue_channel = int(255 * (1 - tm_factor))
-
-            # Red channel is maximum (255) when actual temperature is at 35c, make sure this value
-            # ends up an integer
-            red_channel = int(255 * tm_factor)
+            # Look up the (red, blue) colour channels for the reading to the nearest 0.01c, see the
+            # table built in init()
+            red_channel, blue_channel = self._rgb_lut[int(round((tm_reading - _TM_MIN) * 100))]
 
             # Use NeoPixel.fill() method to set NeoPixels to the calculated colour channels, note: the
-            # green colour channel is not used (it remains 0)
-            self.npm.fill((red_channel, 0, blue_channel))
-            # You must use NeoPixel.write() method when you want the matrix to change
-            self.npm.write()
+            # green colour channel is not used (it remains 0), the fill walks all 32 NeoPixels so
+            # skip it when the colour is the same as the previous reading
+            rgb = (red_channel, 0, blue_channel)
+            filled = rgb != self._last_rgb
+            if filled:
+                npm.fill(rgb)
+                self._last_rgb = rgb
             
-            timer = self.timer
-            
-            if timer<11:
-                self.npm[0]=(255,0,0)
-            else:
-                self.npm[0]=(0,255,0)
+            # NeoPixel 0 shows red for the first readings then green, it only needs setting again
+            # when the fill above has overwritten it or when the indicator colour flips
+            indicator = (255, 0, 0) if timer < 11 else (0, 255, 0)
+            if filled or indicator != self._last_indicator:
+                npm[0] = indicator
+                self._last_indicator = indicator
+                # You must use NeoPixel.write() method when you want the matrix to change, the
+                # indicator is set before writing so the fill and indicator go out in one write
+                npm.write()
                 
             # measurements
             
-            df = df.append({'Temperature': tm_reading  , 'Pressure':  pa_reading , 'Humidity' : rh_reading }, ignore_index=True)
-            self.datapd=df
+            self._csv.writerow((tm_reading, pa_reading, rh_reading))
 
         # Display the sensor readings on the OLED screen 
         self.oled_display()
 
-        # Take readings once every second or so
-        sleep(1)
-        
-        timer+=1
+        # Take readings once every second, sleep until the next whole second after the previous
+        # tick rather than for a fixed second so the time spent in loop() does not add up to drift,
+        # if the loop has fallen behind pick the schedule up again from now
+        self._next_tick += 1.0
+        delay = self._next_tick - time.monotonic()
+        if delay > 0:
+            sleep(delay)
+        else:
+            self._next_tick = time.monotonic()
         
+        timer += 1
         self.timer = timer
-       
-     
-        
-    
+
     def deinit(self):
         """
         The deinit() method is called after the loop() method has finished, is designed
@@ -247,10 +313,8 @@ class MainApp(IoTApp):
         # Make sure the NeoPixel matrix is displaying black colour
         self.npm.fill((0, 0, 0))
         self.npm.write()
-        self.datapd.to_csv(r'Datapoints.csv')
-        timer = self.timer
-        # opening the file in read mode
-        
+        # Close the CSV file so any readings still buffered are written out
+        self._csv_fh.close()
 
 
     def btnA_handler(self, pin):
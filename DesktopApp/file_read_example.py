@@ -43,13 +43,14 @@ class MainApp(IoTApp):
         # Open file for reading using the "r" flag
         self.file = open(self.file_name, "r") 
 
-        # Read each line from the words.txt file (there are three, one on each line in the
-        # text file, position each line in the centre of the OLED screen
-        line1 = self.file.readline().replace("\r\n", "")
+        # Read the words.txt file in one go and split it into lines (there are three, one on each
+        # line in the text file), splitlines() copes with both "\r\n" and "\n" line endings, pad
+        # with empty lines in case the file is short, position each line in the centre of the OLED
+        # screen
+        lines = self.file.read().splitlines()
+        line1, line2, line3 = (lines + ["", "", ""])[:3]
         line1_x = int((128 - (len(line1) * 8)) / 2)
-        line2 = self.file.readline().replace("\r\n", "")
         line2_x = int((128 - (len(line2) * 8)) / 2)
-        line3 = self.file.readline().replace("\r\n", "")
         line3_x = int((128 - (len(line3) * 8)) / 2)
         
         # Display these text lines on the OLED screen
@@ -85,12 +86,13 @@ class MainApp(IoTApp):
         Returns True if the file (does not work with directories) with the supplied name
         exists in the current directory, otherwise returns False
         """
-        # Get the name of all files in the current directory on the Huzzah32's file system
-        # using the os.listdir() function
-        file_names = os.listdir()
-        
-        # Return True if supplied file name is in the files list, otherwise return False
-        return file_name in file_names
+        # os.stat() raises OSError when there is no file of this name to read from
+        try:
+            mode = os.stat(file_name)[0]
+        except OSError:
+            return False
+
+        return not mode & 0x4000
 
 # Program entrance function
 def main():
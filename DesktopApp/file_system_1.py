@@ -7,6 +7,11 @@
 import os
 from libs.iot_app import IoTApp
 
+try:
+    import framebuf
+except ImportError:
+    framebuf = None
+
 # Classes
 class MainApp(IoTApp):
     """
@@ -50,13 +55,27 @@ class MainApp(IoTApp):
         # to all pixels black only white pixels read from the file need to be updated
         self.oled_clear()
 
-        for y in range(32):
-            line = self.file.readline().replace("\r\n", "")
-            x = 0
-            for bit in line:
-                if bit == "1":
-                    self.oled_pixel(x, y, 1)
-                x += 1
+        # Read the whole file in one go and strip the line endings so the "bits" form a single
+        # 32 x 128 string
+        bits = self.file.read().replace("\r", "").replace("\n", "")
+
+        # On the Huzzah32 the OLED driver is a framebuf.FrameBuffer, so pack each line of 128
+        # "bits" into 16 bytes (most significant bit first, i.e. MONO_HLSB) and blit the whole
+        # image in one call rather than setting 4096 pixels one at a time
+        oled = getattr(self, "oled", None)
+        if framebuf and oled:
+            packed = bytearray(512)
+            for y in range(32):
+                packed[y * 16:(y + 1) * 16] = int(bits[y * 128:(y + 1) * 128], 2).to_bytes(16, "big")
+            oled.blit(framebuf.FrameBuffer(packed, 128, 32, framebuf.MONO_HLSB), 0, 0)
+        else:
+            # No framebuffer available (e.g. the simulator), jump straight from one "1" to the
+            # next with str.find() rather than testing every character, the position of each
+            # "1" gives its x and y coordinates
+            i = bits.find("1")
+            while 0 <= i < 4096:
+                self.oled_pixel(i % 128, i // 128, 1)
+                i = bits.find("1", i + 1)
                 
         self.oled_display()
     
@@ -86,12 +105,13 @@ class MainApp(IoTApp):
         Returns True if the file (does not work with directories) with the supplied name
         exists in the current directory, otherwise returns False
         """
-        # Get the name of all files in the current directory on the Huzzah32's file system
-        # using the os.listdir() function
-        file_names = os.listdir()
-        
-        # Return True if supplied file name is in the files list, otherwise return False
-        return file_name in file_names
+        # Look up just this one name with os.stat(), which raises OSError if it does not exist
+        try:
+            mode = os.stat(file_name)[0]
+        except OSError:
+            return False
+
+        return not mode & 0x4000  # Directories have the 0x4000 mode bit set
 
 # Program entrance function
 def main():
@@ -6,9 +6,13 @@
 
 # Imports
 import os
-from time import sleep
 from libs.iot_app import IoTApp
 
+try:
+    import uasyncio as asyncio
+except ImportError:
+    import asyncio
+
 # Classes
 class MainApp(IoTApp):
     """
@@ -35,32 +39,34 @@ class MainApp(IoTApp):
         
         # If the file data.csv already exists on the root of the Huzzah32's file system then
         # first remove it (otherwise it will be appended to since the file is openned using
-        # the "w+" flag, use the file_exists() method to check this and then remove if
+        # the "ab" flag, use the file_exists() method to check this and then remove if
         # necessary
         if self.file_exists(self.file_name):
             os.remove(self.file_name)
         
-        # Open file for appending, note you could open the file simply for writing using the
-        # flag "w" but then if a file of the same name is already on the file system it will
-        # always be overwritten (so be careful)
-        self.file = open(self.file_name, "w+") 
+        # Open file for appending in binary mode using the "ab" flag, the data is written as
+        # bytes so no text encoding is needed on each write, note you could open the file simply
+        # for writing using the flag "wb" but then if a file of the same name is already on the
+        # file system it will always be overwritten (so be careful)
+        self.file = open(self.file_name, "ab")
 
         # Counter used to provide data to write to the file
         self.count = 0
     
-    def loop(self):
+    async def loop(self):
         """
         The loop() method is called after the init() method and is designed to contain
         the part of the program which continues to execute until the finished property
-        is set to True
+        is set to True, as it is defined with async the IoTApp runs it on an asyncio event
+        loop so it can wait using await rather than blocking
         """
         # Clear OLED screen buffer
         self.oled_clear()
         
         # Write current value of count property to file as a new text line, note the
-        # use of the \n character to ensure a new line is written
-        data_str = "{0}\n".format(self.count)
-        self.file.write(data_str)
+        # use of the \n character to ensure a new line is written, the line is built
+        # directly as bytes since the file is open in binary mode
+        self.file.write(b"%d\n" % self.count)
 
         # Draw current count property on OLED screen buffer
         self.oled_text("Count: {0}".format(self.count), 20, 10)
@@ -71,8 +77,8 @@ class MainApp(IoTApp):
         # Increment the counter
         self.count += 1
         
-        # Delay for a second
-        sleep(1)
+        # Delay for a second, handing control back to the event loop rather than blocking
+        await asyncio.sleep(1)
     
     def deinit(self):
         """
@@ -90,12 +96,13 @@ class MainApp(IoTApp):
         Returns True if the file (does not work with directories) with the supplied name
         exists in the current directory, otherwise returns False
         """
-        # Get the name of all files in the current directory on the Huzzah32's file system
-        # using the os.listdir() function
-        file_names = os.listdir()
-        
-        # Return True if supplied file name is in the files list, otherwise return False
-        return file_name in file_names
+        # Check for the file itself with os.stat() rather than reading every name with os.listdir()
+        try:
+            mode = os.stat(file_name)[0]
+        except OSError:
+            return False
+
+        return not mode & 0x4000
 
 # Program entrance function
 def main():
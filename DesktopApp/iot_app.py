@@ -8,11 +8,14 @@ Notes: Base module for all simulated ESP32 MicroPython application code used on
        when NOT able to utilise the prototyping hardware rig
 """
 # Imports
+import asyncio
 import datetime
+import inspect
 import threading
 import uuid
 from time import sleep
 from tkinter import *
+from tkinter import font as tkfont
 from machine import Pin
 from mqtt_simple_ex import MQTTClientEx
 
@@ -106,6 +109,7 @@ class IoTApp:
         self.btn_b = None
         self.btn_c = None
         self.oled_canvas = None
+        self.oled_font = None
         self.neopixel_lbls = []
         self.gui_ready = False
 
@@ -159,6 +163,10 @@ class IoTApp:
         self.oled_canvas = Canvas(self.canvas_frame, bg="#000000")
         self.oled_canvas.place(x=0, y=0, width=500, height=186)
 
+        # Create the OLED font once and reuse it for all text drawn on the OLED canvas, rather
+        # than having Tk resolve the font description again for every piece of text
+        self.oled_font = tkfont.Font(self.root, family="Lucida Console", size=OLED_FONT_SIZE)
+
         for i in range(32):
             self.neopixel_lbls.append(Label(self.neopixel_frame, text="", bg="#708090"))
             self.neopixel_lbls[i].place(x=68 + ((i % 8) * 54), y=8 + ((i // 8) * 54), width=50, height=50)
@@ -174,8 +182,11 @@ class IoTApp:
         self.init()
 
         self.run_state = RunStates.LOOPING
-        while not self.finished:
-            self.loop()
+        if inspect.iscoroutinefunction(self.loop):
+            asyncio.run(self.run_async_loop())
+        else:
+            while not self.finished:
+                self.loop()
             
         self.run_state = RunStates.DEINITIALISING
         self.deinit()
@@ -188,6 +199,10 @@ class IoTApp:
         if self.run_state < RunStates.SHUTTING_DOWN:
             print("\nTerminated with code: {0} <ERROR>".format(self.exit_code))
         
+    async def run_async_loop(self):
+        while not self.finished:
+            await self.loop()
+
     def startup(self):
         if self.oled_on:
             if self.start_verbose:
@@ -259,10 +274,16 @@ class IoTApp:
             if colour:
                 fill = "#000000" if colour == 0 else "#ffffff"
 
-            self.oled_canvas.create_text(xpos, ypos, anchor="nw", fill=fill,
-                                         font=("Lucida Console", OLED_FONT_SIZE),
+            self.oled_canvas.create_text(xpos, ypos, anchor="nw", fill=fill, font=self.oled_font,
                                          text=text)
 
+    def oled_screen(self, lines):
+        # Draw a whole screen of text in one go, lines is a sequence of (text, x, y) tuples
+        self.oled_clear()
+        for text, x, y in lines:
+            self.oled_text(text, x, y)
+        self.oled_display()
+
     def oled_scroll(self, dx=0, dy=0):
         if self.oled_on:
             pass
@@ -4,8 +4,7 @@
 # Date: Jan 2019
 
 # Imports
-import time
-from machine import Pin
+from machine import Pin, Timer
 
 # Program entrance function
 def main():
@@ -18,24 +17,29 @@ def main():
     # Set pin to be a digital output pin with value 0
     led_pin.init(mode=Pin.OUT, value=0)
 
-    count = 0
-    while count < 5:
-        # Switch on the LED pin
-        led_pin.value(1)
-        print("Blink on")
-        
-        # Sleep for 1 second
-        time.sleep(1)
-        
-        # Switch off the LED pin
-        led_pin.value(0)
-        print("Blink off")
+    # Rather than sleeping between each switch of the LED pin, let hardware timer 0 switch
+    # it every second, main() then returns straight away leaving the processor free to do
+    # other work, the timer stops itself once the LED has blinked 5 times
+    switches = [0]
 
-        # Sleep for 1 second
-        time.sleep(1)
-        
-        # Increment count
-        count += 1
+    def switch_led(timer):
+        if led_pin.value():
+            # Switch off the LED pin
+            led_pin.value(0)
+            print("Blink off")
+        else:
+            # Switch on the LED pin
+            led_pin.value(1)
+            print("Blink on")
+
+        # Blinking 5 times is 10 switches of the LED pin, on then off each time
+        switches[0] += 1
+        if switches[0] >= 10:
+            timer.deinit()
+
+    # Switch on the LED pin now then every second switch it over
+    switch_led(None)
+    Timer(0).init(period=1000, mode=Timer.PERIODIC, callback=switch_led)
 
 # Invoke main() program entrance
 if __name__ == "__main__":
@@ -16,7 +16,7 @@ class MQTTClientEx(MQTTPaho.Client):
         self.msg_callback = None
 
     def check_msg(self):
-        self.loop()
+        self.loop(timeout=0)
 
     def on_message(self, mqttc, obj, msg):
         if self.msg_callback:
@@ -5,8 +5,9 @@
 # Date: Apr 2020
 
 # Imports
+import gc
 import random
-from time import sleep
+import threading
 from libs.iot_app import IoTApp
         
 class MainApp(IoTApp):
@@ -54,6 +55,9 @@ class MainApp(IoTApp):
     #    it should happen
     MQTT_TOPIC_1 = "uos/cet235-00/temperature/value"  # Topic name for published temperature
     MQTT_TOPIC_2 = "uos/cet235-00/time/value"  # Topic name for published current time
+
+    # OLED messages shown for each of the 5 attempts to connect to WiFi, built once here
+    _CONNECT_MSGS = tuple("Connect WIFI:%d" % (i + 1) for i in range(5))
         
     def init(self):
         """
@@ -61,12 +65,26 @@ class MainApp(IoTApp):
         app specific properties (such as sensor devices, instance variables etc.)
         """
         self.wifi_msg = "No WIFI"
+
+        # These will hold the OLED lines for the most recently received temperatures and times
+        # from the relevant MQTT subscriptions, initially a "--------" string until a value for
+        # each is received, the whole line is built once when a message arrives so loop() only
+        # ever draws ready made strings
+        self.time_line = "Time: --------"
+        self.temperature_line = "Temp: --------"
+
+        # The (wifi_msg, time_line, temperature_line) last drawn on the OLED screen, see loop()
+        self._last_render = None
+
+        # Set by mqtt_callback() whenever a message has been received so loop() wakes up to redraw
+        self._msg_event = threading.Event()
+
         connect_count = 0
         # Try to connect to WiFi 5 times, if unsuccessful then only try again if button A on
         # the OLED is pressed
         while connect_count < 5 and not self.is_wifi_connected():
             self.oled_clear()
-            self.wifi_msg = "Connect WIFI:{0}".format(connect_count + 1) 
+            self.wifi_msg = self._CONNECT_MSGS[connect_count]
             self.oled_text(self.wifi_msg, 0, 0)
             self.oled_display()
             self.connect_to_wifi(wifi_settings=(self.AP_SSID, self.AP_PSWD, True, self.AP_TOUT))
@@ -74,6 +92,12 @@ class MainApp(IoTApp):
 
         if self.is_wifi_connected():
             self.wifi_msg = "WIFI"
+            # Tidy up before the MQTT client's socket buffers are allocated (gc.mem_free() and
+            # gc.threshold() are only there under MicroPython)
+            gc.collect()
+            if hasattr(gc, "mem_free"):
+                gc.threshold(gc.mem_free() // 4 + gc.mem_alloc())
+
             # Register with the MQTT broker and link the method mqtt_callback() as the callback
             # when messages are recieved
             self.register_to_mqtt(server=self.MQTT_ADDR, port=self.MQTT_PORT,
@@ -84,6 +108,11 @@ class MainApp(IoTApp):
             # Subscribe to topic "uos/cet235-00/time/value"
             self.mqtt_client.subscribe(self.MQTT_TOPIC_2)
 
+            # Hand the MQTT network traffic to the MQTT client's own background thread so a slow
+            # round trip to the broker never holds up the OLED, mqtt_callback() is then called
+            # from that thread as messages arrive
+            self.mqtt_client.loop_start()
+
             self.oled_clear()
             self.oled_display()
         else:
@@ -91,29 +120,27 @@ class MainApp(IoTApp):
             self.oled_clear()
             self.oled_display()
 
-        # These will hold the most recently received temperatures and times from the relevant MQTT
-        # subscriptions, initially a "--------" string until a value for each is received
-        self.temperature_str = "--------"
-        self.time_str = "--------"
-
     def loop(self):
         """
         The loop() method is called after the init() method and is designed to contain
         the part of the program which continues to execute until the finished property
         is set to True
         """
-        self.oled_clear()
-        self.oled_text(self.wifi_msg, 0, 0)
-        self.oled_text("Time: {0}".format(self.time_str), 0, 10)
-        self.oled_text("Temp: {0}".format(self.temperature_str), 0, 20)
-        self.oled_display()
+        # Only redraw the OLED screen when something shown on it has changed since it was last
+        # drawn, most loops nothing has been received from the MQTT broker
+        render = (self.wifi_msg, self.time_line, self.temperature_line)
+        if render != self._last_render:
+            self.oled_clear()
+            self.oled_text(self.wifi_msg, 0, 0)
+            self.oled_text(self.time_line, 0, 10)
+            self.oled_text(self.temperature_line, 0, 20)
+            self.oled_display()
+            self._last_render = render
 
-        if self.is_wifi_connected():
-            # Check for any messages received from the MQTT broker, note this is a non-blocking
-            # operation so if no messages are currently present the loop() method continues
-            self.mqtt_client.check_msg()
-        
-        sleep(0.1)
+        # Wait for up to a second for a message from the MQTT broker rather than polling, this
+        # returns as soon as mqtt_callback() signals that a message has been received
+        self._msg_event.wait(1.0)
+        self._msg_event.clear()
         
     def deinit(self):
         """
@@ -122,9 +149,10 @@ class MainApp(IoTApp):
         properties, for instance shutting down sensor devices. It can also be used to
         display final information on output devices (such as the OLED FeatherWing)
         """
-        # In this specific implementation the deint() method does nothing, only included
-        # for completeness sake
-        pass
+        # Stop the MQTT client's background network thread, the IoTApp disconnects from the
+        # MQTT broker when it shuts down
+        if self.mqtt_client:
+            self.mqtt_client.loop_stop()
 
     def mqtt_callback(self, topic, msg):
         """
@@ -134,12 +162,19 @@ class MainApp(IoTApp):
         acceptable
         """
         # Note: msg is a list of bytes so you need to convert these into a proper string
-        # using the .decode("utf-8") method
+        # using the .decode("utf-8") method, this already returns a string so there is no
+        # need to wrap it in str() or format it again
+        #
+        # The simulated MQTT client passes the topic as a str (on the ESP32 umqtt passes bytes) so
+        # it is compared directly against the str topic names with no encoding or decoding
         if topic == self.MQTT_TOPIC_1:
-            self.temperature_str = "{0}c".format(str(msg.decode("utf-8")))
+            self.temperature_line = "Temp: " + msg.decode("utf-8") + "c"
 
         if topic == self.MQTT_TOPIC_2:
-            self.time_str = str(msg.decode('utf-8'))
+            self.time_line = "Time: " + msg.decode("utf-8")
+
+        # Wake up loop() so the OLED is redrawn with the new value
+        self._msg_event.set()
 
 # Program entrance function
 def main():
@@ -4,21 +4,42 @@
 # Date: Jan 2019
 
 # Imports
-from time import sleep
 from machine import Pin
 from neopixel import NeoPixel
 
-def display_centre(npm, colour):
-    npm[11] = colour
-    npm[12] = colour
-    npm[19] = colour
-    npm[20] = colour
+try:
+    import uasyncio as asyncio
+except ImportError:
+    import asyncio
+
+# Muted colours used by the NeoPixels, defined once here rather than building a new colour
+# tuple every time one is drawn
+BLACK = (0, 0, 0)
+RED = (10, 0, 0)
+BLUE = (0, 0, 10)
+WHITE = (10, 10, 10)
+
+# Colours the centre NeoPixels flash through in turn, each one as the bytes for a pair of
+# NeoPixels in the NeoPixel buffer (the NeoPixel FeatherWing holds each NeoPixel as green,
+# red, blue bytes so the channels are swapped round to match)
+CENTRE_COLOURS = (RED, WHITE, BLUE)
+CENTRE_PATTERNS = tuple(bytes((green, red, blue)) * 2 for red, green, blue in CENTRE_COLOURS)
+
+def display_centre(npm, pattern):
+    # Write the colour straight into the NeoPixel buffer rather than one NeoPixel at a time,
+    # NeoPixels 11 and 12 are next to each other as are NeoPixels 19 and 20, so each pair is
+    # a single slice assignment
+    bpp = npm.bpp
+    mv = memoryview(npm.buf)
+    mv[11 * bpp:13 * bpp] = pattern
+    mv[19 * bpp:21 * bpp] = pattern
     npm.write()
 
 # Program entrance function
-def main():
+async def main():
     """
-    Main function
+    Main function, a coroutine so the waits between animation steps hand control back to
+    the event loop rather than blocking
     """
     # Pin 21 is connected to the NeoPixel FeatherWing via a jumper wire
     neopixel_pin = Pin(21)
@@ -58,28 +79,20 @@ def main():
     # bottom right
     
     # Make sure all the NeoPixels start off, this is good practice
-    npm.fill((0, 0, 0))  # "black" ie. all NeoPixels switched off
+    npm.fill(BLACK)  # "black" ie. all NeoPixels switched off
     npm.write()
     
-    # Flash centre colours 15 times
-    for _ in range(15):    
-        # Draw 4 centre NeoPixels in red (10, 0, 0)
-        display_centre(npm, (10, 0, 0))
-        sleep(0.3)
-    
-        # Draw 4 centre NeoPixels in muted white (10, 10, 10)
-        display_centre(npm, (10, 10, 10))
-        sleep(0.3)
-    
-        # Draw 4 centre NeoPixels in blue (0, 0, 10)
-        display_centre(npm, (0, 0, 10))
-        sleep(0.3)
+    # Flash centre colours 15 times, each time drawing the 4 centre NeoPixels in red (10, 0, 0),
+    # then muted white (10, 10, 10), then blue (0, 0, 10), so 45 steps through CENTRE_COLOURS
+    for i in range(45):
+        display_centre(npm, CENTRE_PATTERNS[i % 3])
+        await asyncio.sleep(0.3)
     
     # Switch off all the NeoPixels, good practice before program ends
-    npm.fill((0, 0, 0))
+    npm.fill(BLACK)
     npm.write()
 
 # Invoke main() program entrance
 if __name__ == "__main__":
     # execute only if run as a script
-    main()
+    asyncio.run(main())
@@ -4,21 +4,39 @@
 # Date: Jan 2019
 
 # Imports
-from time import sleep
 from machine import Pin
 from neopixel import NeoPixel
 
-def display_line(npm, col, colour):
-    npm[col] = colour
-    npm[col + 8] = colour
-    npm[col + 16] = colour
-    npm[col + 24] = colour
-    npm.write()
+try:
+    import uasyncio as asyncio
+except ImportError:
+    import asyncio
+
+# Muted colours used by the NeoPixels, defined once here rather than building a new colour
+# tuple every time one is drawn
+BLACK = (0, 0, 0)
+RED = (10, 0, 0)
+GREEN = (0, 10, 0)
+
+# The same colours as the bytes held for one NeoPixel in the NeoPixel buffer, the NeoPixel
+# FeatherWing holds each NeoPixel as green, red, blue bytes so the channels are swapped round
+BLACK_BYTES, RED_BYTES, GREEN_BYTES = (bytes((green, red, blue)) for red, green, blue in
+                                       (BLACK, RED, GREEN))
+
+def set_line(npm, col, pattern):
+    # Write the colour straight into the NeoPixel buffer rather than one NeoPixel at a time,
+    # the line is one NeoPixel in each of the 4 rows of 8, note: this does not call write()
+    # so that removing the previous line and drawing the next one go out in a single write
+    bpp = npm.bpp
+    mv = memoryview(npm.buf)
+    for i in range(col * bpp, 32 * bpp, 8 * bpp):
+        mv[i:i + bpp] = pattern
 
 # Program entrance function
-def main():
+async def main():
     """
-    Main function
+    Main function, a coroutine so the waits between animation steps hand control back to
+    the event loop rather than blocking
     """
     # Pin 21 is connected to the NeoPixel FeatherWing via a jumper wire
     neopixel_pin = Pin(21)
@@ -58,34 +76,39 @@ def main():
     # bottom right
     
     # Make sure all the NeoPixels start off, this is good practice
-    npm.fill((0, 0, 0))  # "black" ie. all NeoPixels switched off
+    npm.fill(BLACK)  # "black" ie. all NeoPixels switched off
     npm.write()
     
+    # Column of the vertical line currently drawn, removed when the next line is drawn
+    prev_c = 0
+
     # Do this 3 times
     for _ in range(3):
         # Animate the vertical line moving from left to right
         for c in range(8):    
-            # Draw vertical line of NeoPixels in red (10, 0, 0) at the current column
-            # dictated by index c
-            display_line(npm, c, (10, 0, 0))
-            sleep(0.3)
-            # Remove vertical line at current column
-            display_line(npm, c, (0, 0, 0))
+            # Remove vertical line at previous column and draw vertical line of NeoPixels in
+            # red (10, 0, 0) at the current column dictated by index c, then write both at once
+            set_line(npm, prev_c, BLACK_BYTES)
+            set_line(npm, c, RED_BYTES)
+            npm.write()
+            prev_c = c
+            await asyncio.sleep(0.3)
 
         # Animate the vertical line moving from right to left
         for c in reversed(range(8)):    
-            # Draw vertical line of NeoPixels in green (0, 10, 0) at the current column
-            # dictated by index c
-            display_line(npm, c, (0, 10, 0))
-            sleep(0.3)
-            # Remove vertical line at current column
-            display_line(npm, c, (0, 0, 0))
+            # Remove vertical line at previous column and draw vertical line of NeoPixels in
+            # green (0, 10, 0) at the current column dictated by index c, then write both at once
+            set_line(npm, prev_c, BLACK_BYTES)
+            set_line(npm, c, GREEN_BYTES)
+            npm.write()
+            prev_c = c
+            await asyncio.sleep(0.3)
     
     # Switch off all the NeoPixels, good practice before program ends
-    npm.fill((0, 0, 0))
+    npm.fill(BLACK)
     npm.write()
 
 # Invoke main() program entrance
 if __name__ == "__main__":
     # execute only if run as a script
-    main()
+    asyncio.run(main())
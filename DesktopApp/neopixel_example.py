@@ -9,6 +9,14 @@ from machine import Pin
 from neopixel import NeoPixel
 from iot_app import IoTApp
 
+# Muted colours used by the NeoPixels, defined once here rather than building a new colour
+# tuple every time one is drawn
+BLACK = (0, 0, 0)
+RED = (10, 0, 0)
+GREEN = (0, 10, 0)
+BLUE = (0, 0, 10)
+WHITE = (10, 10, 10)
+
 # Program entrance function
 def main():
     """
@@ -42,18 +50,18 @@ def main():
     
     # Make sure all the NeoPixels start off, NeoPixel.fill() method sets all 
     # NeoPixels to the same colour, this is good practice
-    npm.fill((0, 0, 0))  # "black" ie. all NeoPixels switched off
+    npm.fill(BLACK)  # "black" ie. all NeoPixels switched off
     # You must use NeoPixel.write() method when you want the matrix to change
     npm.write()
     
     # Set all NeoPixels to muted white (10, 10, 10) colour
-    npm.fill((10, 10, 10))  # Muted white
+    npm.fill(WHITE)  # Muted white
     npm.write()
     
     sleep(2)
     
     # Switch off all the NeoPixels
-    npm.fill((0, 0, 0))  # "black" ie. all NeoPixels swithced off
+    npm.fill(BLACK)  # "black" ie. all NeoPixels swithced off
     npm.write()
     
     # Each NeoPixel can be changed using the [] indexing from 0..31, this splits
@@ -69,16 +77,16 @@ def main():
     #
     # Show red at top left, green at top right, blue at bottom left and white at
     # bottom right
-    npm[0] = (10, 0, 0)
-    npm[7] = (0, 10, 0)
-    npm[24] = (0, 0, 10)
-    npm[31] = (10, 10, 10)
+    npm[0] = RED
+    npm[7] = GREEN
+    npm[24] = BLUE
+    npm[31] = WHITE
     npm.write()
     
     sleep(2)
     
     # Switch off all the NeoPixels, good practice before program ends
-    npm.fill((0, 0, 0))
+    npm.fill(BLACK)
     npm.write()
  
 # Invoke main() program entrance
@@ -4,8 +4,14 @@
 # Date: Apr 2020
 
 # Imports
+import gc
 from time import sleep
 from libs.iot_app import IoTApp
+
+try:
+    import uasyncio as asyncio
+except ImportError:
+    import asyncio
         
 class MainApp(IoTApp):
     """
@@ -27,6 +33,12 @@ class MainApp(IoTApp):
     AP_TOUT = 5000
     NTP_ADDR = "13.86.101.172"  # IP address of time.windows.com, NTP server at Microsoft
     NTP_PORT = 123  # NTP server port number (by default this is port 123)
+
+    # OLED messages shown for each of the 5 attempts to connect to WiFi, built once here
+    _CONNECT_MSGS = tuple("Connect WIFI:%d" % (i + 1) for i in range(5))
+
+    # Three letter day names, sliced once here rather than every time the date is drawn
+    _DAY3 = tuple(name[:3] for name in IoTApp._DAY_NAMES)
         
     def init(self):
         """
@@ -38,13 +50,18 @@ class MainApp(IoTApp):
         # Try to connect to WiFi 5 times
         while connect_count < 5 and not self.is_wifi_connected():
             self.oled_clear()
-            self.oled_text("Connect WIFI:{0}".format(connect_count + 1), 0, 0)
+            self.oled_text(self._CONNECT_MSGS[connect_count], 0, 0)
             self.oled_display()
             self.connect_to_wifi(wifi_settings=(self.AP_SSID, self.AP_PSWD, True, self.AP_TOUT))
             connect_count += 1
             
         if self.is_wifi_connected():
             self.ntp_msg = "NTP - RTC good"
+            # Collect before the NTP request, gc.threshold() is only set when run under MicroPython
+            gc.collect()
+            if hasattr(gc, "mem_free"):
+                gc.threshold(gc.mem_free() // 4 + gc.mem_alloc())
+
             # Contact the NTP server and update the RTC with the correct date and time as
             # provided by this server, the method set_rtc_by_ntp() is a convenience method
             # that is implemented in the IoTApp class and therefore inherited by your own
@@ -58,26 +75,31 @@ class MainApp(IoTApp):
             self.oled_text("No WIFI", 0, 0)
             self.oled_display()
             sleep(4)
-        
-    def loop(self):
+
+        # Seconds value of the RTC last drawn on the OLED screen, see loop()
+        self._last_se = None
+
+    async def loop(self):
         """
         The loop() method is called after the init() method and is designed to contain
         the part of the program which continues to execute until the finished property
-        is set to True
+        is set to True, as it is defined with async the IoTApp runs it on an asyncio event
+        loop so it can wait using await rather than blocking
         """
-        self.oled_clear()
-
-        # Get currently accurate date and time and display it
+        # Get currently accurate date and time and display it, nothing shown changes until the
+        # seconds do so only redraw the OLED screen when they have changed since the last redraw
         yr, mn, dy, dn, hr, mi, se, ms = self.rtc.datetime()
-        self.oled_text(self.ntp_msg, 0, 2)
-        output = "{0} {1:02d}-{2:02d}-{3}".format(self._DAY_NAMES[dn][0:3], dy, mn, yr)
-        self.oled_text(output, 0, 12)
-        output = "{0:02d}:{1:02d}:{2:02d}".format(hr, mi, se)
-        self.oled_text(output, 0, 22)
+        if se != self._last_se:
+            self.oled_clear()
+            self.oled_text(self.ntp_msg, 0, 2)
+            self.oled_text("%s %02d-%02d-%d" % (self._DAY3[dn], dy, mn, yr), 0, 12)
+            self.oled_text("%02d:%02d:%02d" % (hr, mi, se), 0, 22)
 
-        self.oled_display()
+            self.oled_display()
+            self._last_se = se
 
-        sleep(0.1)
+        # Hand control back to the event loop for 0.1 seconds rather than blocking in sleep()
+        await asyncio.sleep(0.1)
 
     def deinit(self):
         """
@@ -4,31 +4,31 @@
 # Date: Jan 2019
 
 # Imports
-from time import sleep
+from time import sleep_ms
 from machine import Pin
 from neopixel import NeoPixel
+
+# Constants
+PIXELS = 32  # Number of NeoPixels on the NeoPixel FeatherWing (4 x 8 = 32)
+RED = 0      # Indices into PALETTE
+GREEN = 1
+BLUE = 2
+OFF = 3
+# Complete NeoPixel buffer contents for each colour, worked out once when the
+# module is loaded so a button press is a single copy into the NeoPixel buffer,
+# the NeoPixel FeatherWing holds each NeoPixel as green, red, blue bytes so red
+# (10, 0, 0) is stored as the bytes 0, 10, 0 and so on
+PALETTE = (bytes((0, 10, 0)) * PIXELS,  # Red
+           bytes((10, 0, 0)) * PIXELS,  # Green
+           bytes((0, 0, 10)) * PIXELS,  # Blue
+           bytes(3 * PIXELS))           # Off
+BUTTONS = ((15, RED),    # Button A is connected to pin 15 and sets red color
+           (32, GREEN),  # Button B is connected to pin 32 and sets green color
+           (14, BLUE))   # Button C is connected to pin 14 and sets blue color
         
 # Globals
 npm = None  # NeoPixel matrix object, used in a number of functions
 
-# Handler for when Button A is pressed        
-def button_a_handler(pin):
-    # Set all NeoPixels to red color
-    npm.fill((10, 0, 0))
-    npm.write()
-
-# Handler for when Button B is pressed        
-def button_b_handler(pin):
-    # Set all NeoPixels to green color
-    npm.fill((0, 10, 0))
-    npm.write()
-
-# Handler for when Button C is pressed        
-def button_c_handler(pin):
-    # Set all NeoPixels to blue color
-    npm.fill((0, 0, 10))
-    npm.write()
-
 # Program entrance function
 def main():
     """
@@ -45,7 +45,7 @@ def main():
     # Instantiate a NeoPixel obejct with the required NeoPixel FeatherWing pin, 
     # number of NeoPixels (4 x 8 = 32), bytes used for colour of each NeoPixel
     # and a timing value (keep as 1)
-    npm = NeoPixel(neopixel_pin, 32, bpp=3, timing=1)
+    npm = NeoPixel(neopixel_pin, PIXELS, bpp=3, timing=1)
     
     # Colours are set using a RGB channel tuple value with first element of the
     # tuple the red value (0..255), the second element the green value and the
@@ -73,32 +73,44 @@ def main():
     # Show red at top left, green at top right, blue at bottom left and white at
     # bottom right
     
-    # Button A is connected to pin 15 on the Huzzah32 Feather, set this pin to be a
-    # digital input
-    button_a_pin = Pin(15, Pin.IN)
-    # Wire-up the function button_a_handler() as the interrupt handler for Button A
-    button_a_pin.irq(button_a_handler)
-    
-    # Button B is connected to pin 32 on the Huzzah32 Feather, set this pin to be a
-    # digital input
-    button_b_pin = Pin(32, Pin.IN)
-    # Wire-up the function button_b_handler() as the interrupt handler for Button B
-    button_b_pin.irq(button_b_handler)
-    
-    # Button C is connected to pin 14 on the Huzzah32 Feather, set this pin to be a
-    # digital input
-    button_c_pin = Pin(14, Pin.IN)
-    # Wire-up the function button_b_handler() as the interrupt handler for Button C
-    button_c_pin.irq(button_c_handler)
+    # Set the pin of each button in BUTTONS to be a digital input with the internal
+    # pull-up enabled, the pin then reads 1 until the button is pressed when it
+    # reads 0
+    #
+    # The buttons are read (polled) every 20 milliseconds rather than wiring up
+    # interrupt handlers, so nothing can interrupt NeoPixel.write() part way
+    # through and no code runs inside an interrupt, 20 milliseconds between reads
+    # is also long enough for switch bounce to be ignored, cache the value()
+    # method of each pin and keep the last value read from each pin (1 is not
+    # pressed) so only the moment a button goes down is acted on
+    reads = tuple(Pin(pin, Pin.IN, Pin.PULL_UP).value for pin, _ in BUTTONS)
+    prev = bytearray(b"\x01" * len(BUTTONS))
     
-    # Use NeoPixel.fill() method sets all NeoPixels to off
-    npm.fill((0, 0, 0))
+    # Copy the precomputed buffer for off into the NeoPixel buffer to set all
+    # NeoPixels to off
+    npm.buf[:] = PALETTE[OFF]
     # You must use NeoPixel.write() method when you want the matrix to change
     npm.write()
     
     # Run the program for ever
     while True:
-        sleep(0.1)
+        # Colour to change to if a button has just been pressed, if more than one
+        # button goes down between reads the last one checked wins and only a
+        # single write() is made
+        colour = None
+        
+        for i in range(len(BUTTONS)):
+            cur = reads[i]()
+            if cur != prev[i]:
+                prev[i] = cur
+                if cur == 0:
+                    colour = BUTTONS[i][1]
+        
+        if colour is not None:
+            npm.buf[:] = PALETTE[colour]
+            npm.write()
+        
+        sleep_ms(20)
 
 # Invoke main() program entrance
 if __name__ == "__main__":
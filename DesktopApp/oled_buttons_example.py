@@ -4,40 +4,54 @@
 # Date: Jan 2019
 
 # Imports
+import threading
 from time import sleep
 from machine import Pin
 from neopixel import NeoPixel
 from iot_app import IoTApp
 
         
+# Constants
+OFF = (0, 0, 0)
+WHITE = (10, 10, 10)
+        
 # Globals
 npm = None  # NeoPixel matrix object, used in a number of functions
 count = 0   # Count to control how many times the press of Button A
             # is handled when the NeoPixel matrix is showing muted
             # white colour
-            
+pending = [OFF, False]  # [0] is the colour the NeoPixel matrix should show
+                        # and [1] is a dirty flag, the handlers only set these
+                        # and leave the fill() and write() to main() so a
+                        # burst of presses results in a single write()
+pixels_changed = threading.Event()  # Set by the button handlers whenever they
+                                   # change pending, main() blocks on this
+                                   # instead of waking up every 0.1 seconds
+
 
 
 # Handler for when Button A is pressed        
 def button_a_handler(pin):
-    # If the first NeoPixel is (0, 0, 0) then all NeoPixels are currently
-    # off so set all NeoPixels to muted white (10, 10, 10)
-    if npm[0] == (0, 0, 0):
-        npm.fill((10, 10, 10))
-        npm.write()
+    # If all NeoPixels are currently (or about to be) off then ask main() to
+    # set all NeoPixels to muted white (10, 10, 10)
+    if pending[0] == OFF:
+        pending[0] = WHITE
+        pending[1] = True
+        pixels_changed.set()
 
 # Handler for when Button B is pressed        
 def button_b_handler(pin):
     # Access global count variable
     global count
     
-    # If the first NeoPixel is (10, 10, 10) then muted white is currently
-    # shown on the NeoPixel matrix so set all NeoPixels to off (0, 0, 0)
-    # and increment the count variable
-    if npm[0] == (10, 10, 10):
-        npm.fill((0, 0, 0))
-        npm.write()
+    # If muted white is currently (or about to be) shown on the NeoPixel
+    # matrix then ask main() to set all NeoPixels to off (0, 0, 0) and
+    # increment the count variable
+    if pending[0] == WHITE:
+        pending[0] = OFF
+        pending[1] = True
         count += 1
+        pixels_changed.set()
 
 # Program entrance function
 def main():
@@ -99,13 +113,20 @@ def main():
     #button_b_pin.irq(button_b_handler)
     
     # Use NeoPixel.fill() method sets all NeoPixels to off
-    npm.fill((0, 0, 0))
+    npm.fill(OFF)
     # You must use NeoPixel.write() method when you want the matrix to change
     npm.write()
     
     # Run the program for 3 changes of NeoPixel matrix to show muted white
     while count < 3:
-        sleep(0.1)
+        pixels_changed.wait()
+        pixels_changed.clear()
+        
+        # Write out the most recent colour asked for by the button handlers
+        if pending[1]:
+            pending[1] = False
+            npm.fill(pending[0])
+            npm.write()
         
     # Colour all NeoPixels red just before exiting the program
     npm.fill((10, 0, 0))
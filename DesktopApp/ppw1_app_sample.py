@@ -3,6 +3,9 @@
 # Author: Chris Knowles, University of Sunderland
 # Date: Jan 2019
 
+import array
+import asyncio
+import csv
 import time
 import random
 
@@ -12,32 +15,24 @@ class DataReading:
     Class to hold a single data reading, this consists of a given timestamp and given temperature and humidity
     data for this time stamp
     """
+    # Data readings are created in large numbers, so fixed slots are used in place of a per instance __dict__ and
+    # the attributes are read directly rather than through properties
+    __slots__ = ("timestamp", "temp_data", "humidity_data")
+
     def __init__(self, timestamp, temp_data, humidity_data):
         """
         Initialiser - instance variables:
-            __timestamp: timestamp for this data reading, as string, property with read-only access
-            __temp_data: temperature data for this data reading, as float, property with read-only access
-            __humidity_data: humidity data for this data reading, as float, property with read-only access
+            timestamp: timestamp for this data reading, as string
+            temp_data: temperature data for this data reading, as float
+            humidity_data: humidity data for this data reading, as float
 
         :param timestamp: to associate with this data reading instance
         :param temp_data: to associate with this data reading instance
         :param humidity_data: to associate with this data reading instance
         """
-        self.__timestamp = timestamp
-        self.__temp_data = temp_data
-        self.__humidity_data = humidity_data
-
-    @property
-    def timestamp(self):
-        return self.__timestamp
-
-    @property
-    def temp_data(self):
-        return self.__temp_data
-
-    @property
-    def humidity_data(self):
-        return self.__humidity_data
+        self.timestamp = timestamp
+        self.temp_data = temp_data
+        self.humidity_data = humidity_data
 
     def __str__(self):
         """
@@ -45,7 +40,7 @@ class DataReading:
 
         :return: string representation of this data reading instance
         """
-        return "Timestamp: {0} {1}c {2}%".format(self.timestamp, self.temp_data, self.humidity_data)
+        return f"Timestamp: {self.timestamp} {self.temp_data}c {self.humidity_data}%"
 
 
 class AccessPeriod:
@@ -64,11 +59,14 @@ class AccessPeriod:
             __stop_time: stop time of this access period, as string, property with read-only access
             __period_length: approximate number of seconds this access period lasted, as int, property with
                              read-only access
-            __data_readings: list of DataReadings class instances, property with no access
+            __timestamps: list of the timestamps of the data readings, as strings, property with no access
+            __temps: array of the temperatures of the data readings, as floats, property with no access
+            __humidities: array of the humidities of the data readings, as floats, property with no access
             __temp_max: maximum temperature across all data readings in the data set, as float, property with
-                        read-only access
-            __humidity_average: average humidity across all data readings in the data set, as float, property with
-                                read-only access
+                        read-only access (-inf until a data reading has been added, the property is None until then)
+            __humidity_sum: running total of humidity across all data readings in the data set, as float, used for
+                            the humidity_average property with read-only access (0.0 until a data reading has been
+                            added, the property is None until then)
 
         :param start_date: start date of this access period, as string
         :param start_time: start time of this access period, as string
@@ -78,9 +76,13 @@ class AccessPeriod:
         self.__stop_date = None  # This is updated separately once the instance has been created
         self.__stop_time = None  # This is updated separately once the instance has been created
         self.__period_length = 0  # This is updated separately once the instance has been created
-        self.__data_readings = []  # Initially empty until data readings are added
-        self.__temp_max = None  # This will be calculated and assigned when data readings are added
-        self.__humidity_average = None  # This will be calculated and assigned when data readings are added
+        # The data readings are held as one column per field rather than as a list of DataReading instances, the
+        # numeric columns are arrays of C doubles so each reading costs 8 bytes per value rather than a full object
+        self.__timestamps = []  # Initially empty until data readings are added
+        self.__temps = array.array("d")  # Initially empty until data readings are added
+        self.__humidities = array.array("d")  # Initially empty until data readings are added
+        self.__temp_max = float("-inf")  # Lower than any temperature, so the first data reading always replaces it
+        self.__humidity_sum = 0.0  # Running total of the humidity across all data readings added so far
 
     @property
     def start_date(self):
@@ -116,11 +118,11 @@ class AccessPeriod:
 
     @property
     def temp_max(self):
-        return self.__temp_max
+        return self.__temp_max if self.__temps else None
 
     @property
     def humidity_average(self):
-        return self.__humidity_average
+        return self.__humidity_sum / len(self.__humidities) if self.__humidities else None
 
     def add_data_reading(self, data_reading):
         """
@@ -131,36 +133,37 @@ class AccessPeriod:
 
         :return: nothing
         """
-        # Add data reading to the data readings property
-        self.__data_readings.append(data_reading)
-
-        # Check if the temperature associated with this data reading is greater than the currently recorded maximum
-        # temperature, note: if this is the first data reading added then the maximum temperature must be the
-        # temperature from this reading
-        if not self.temp_max:
-            self.__temp_max = data_reading.temp_data
-        elif data_reading.temp_data > self.temp_max:
+        # Add data reading to the data readings columns
+        self.__timestamps.append(data_reading.timestamp)
+        self.__temps.append(data_reading.temp_data)
+        self.__humidities.append(data_reading.humidity_data)
+
+        # Keep the maximum temperature and the running total of the humidity up to date, the humidity average is
+        # worked out from the running total when it is read so the data readings never have to be scanned again
+        if data_reading.temp_data > self.__temp_max:
             self.__temp_max = data_reading.temp_data
+        self.__humidity_sum += data_reading.humidity_data
 
-        # Update the humidity average to take account of this newly added data reading, note: if this is the first
-        # data reading added then the average will be the humidity from this reading
-        if not self.humidity_average:
-            self.__humidity_average = data_reading.humidity_data
-        else:
-            self.calculate_humidity_average()
-
-    def calculate_humidity_average(self):
+    def add_data_readings(self, timestamps, temps, humidities):
         """
-        This method calculates the average of the humidity data held in the data readings list and updates the humidity
-        average property with this value.
+        This method is used to add a number of data readings to this AccessPeriod class instance in one go, given as
+        one sequence per field rather than as DataReading class instances, the maximum temperature and humidity
+        average are updated the same as for add_data_reading()
+
+        :param timestamps: timestamps of the data readings to be added, as sequence of strings
+        :param temps: temperatures of the data readings to be added, as sequence of floats
+        :param humidities: humidities of the data readings to be added, as sequence of floats
 
-        :return:
+        :return: nothing
         """
-        total = 0.0
-        for data_reading in self.__data_readings:
-            total += data_reading.humidity_data
+        # Add the data readings to the data readings columns
+        self.__timestamps.extend(timestamps)
+        self.__temps.extend(temps)
+        self.__humidities.extend(humidities)
 
-        self.__humidity_average = total / len(self.__data_readings)
+        # Keep the maximum temperature and the running total of the humidity up to date
+        self.__temp_max = max(self.__temp_max, max(temps, default=self.__temp_max))
+        self.__humidity_sum += sum(humidities)
 
     def print_access_period(self):
         """
@@ -169,23 +172,28 @@ class AccessPeriod:
         :return: nothing
         """
         # First, print the start and end date and time for this access period
-        print("Started:  {0} {1}".format(self.start_date, self.start_time))
-        print("Stopped:  {0} {1}".format(self.stop_date, self.stop_time))
+        print(f"Started:  {self.start_date} {self.start_time}")
+        print(f"Stopped:  {self.stop_date} {self.stop_time}")
 
         # Second, print approximate length of the access period in seconds
-        print("Length:   {0} seconds (approx)".format(self.period_length))
+        print(f"Length:   {self.period_length} seconds (approx)")
 
         # Third, print the maximum temperature recorded during this access period
-        print("Max Temp: {0} degrees C".format(self.temp_max))
+        print(f"Max Temp: {self.temp_max} degrees C")
 
-        # Fourth, print the humidity average recorded during this access period (to two decimal places)
-        print("Hmdy Ave: {0:.2f} %".format(self.humidity_average))
+        # Fourth, print the humidity average recorded during this access period (to two decimal places), there is
+        # no average if the access period has no data readings
+        humidity_average = self.humidity_average
+        if humidity_average is None:
+            print("Hmdy Ave: None")
+        else:
+            print(f"Hmdy Ave: {humidity_average:.2f} %")
 
         # Finally, print the full list of data readings for this access period
         print("Data Readings:")
         print("------------------------------------------------------------")
-        for data_reading in self.__data_readings:
-            print(data_reading)
+        for data_reading in zip(self.__timestamps, self.__temps, self.__humidities):
+            print(DataReading(*data_reading))
 
 
 class AccessPeriods:
@@ -221,27 +229,102 @@ class AccessPeriods:
         """
         return self.__access_periods
 
+    def __iter__(self):
+        """
+        Iterate over the access periods one at a time, use this in preference to get_access_periods() when only a
+        single pass over the access periods is needed.
+
+        :return: Iterator over the AccessPeriod instances.
+        """
+        return iter(self.__access_periods)
+
+    def __len__(self):
+        """
+        Get the number of access periods.
+
+        :return: Number of AccessPeriod instances, as int.
+        """
+        return len(self.__access_periods)
+
+
+# Function to read access periods from a CSV data file
+def stream_from_csv(data_file):
+    """
+    Generator function to read the access periods from a CSV data file written by the PPW1 IoT app, each access period
+    is yielded as soon as its ACCESS-STOPPED line has been read so only one access period is held in memory at a time,
+    the CSV data file has lines of the form:-
+
+        ACCESS-STARTED,dd/mm/yyyy,hh:mm:ss
+        yyyy-mm-dd|hh:mm:ss,temperature,humidity
+        ACCESS-STOPPED,dd/mm/yyyy,hh:mm:ss,seconds
+
+    :param data_file: path to the data_file, as string
 
-# Simulation function to generate simulated temperature and humidity data
-def generate_simulated_data():
+    :return: Generator of AccessPeriod instances.
     """
-    Function to generate simulated temperature and humidity data.
+    access_period = None
+    with open(data_file, "r", newline="") as file:
+        for row in csv.reader(file):
+            if not row:
+                continue
+            if row[0] == "ACCESS-STARTED":
+                # Collect the data readings for this access period as columns and add them all in one go when the
+                # access period stops, no DataReading class instances are needed
+                access_period = AccessPeriod(row[1], row[2])
+                timestamps = []
+                temps = array.array("d")
+                humidities = array.array("d")
+            elif access_period is None:
+                # Data readings outside of an access period are ignored
+                continue
+            elif row[0] == "ACCESS-STOPPED":
+                access_period.add_data_readings(timestamps, temps, humidities)
+                access_period.stop_date = row[1]
+                access_period.stop_time = row[2]
+                access_period.period_length = int(row[3])
+                yield access_period
+                access_period = None
+            else:
+                timestamps.append(row[0].rpartition("|")[2])
+                temps.append(float(row[1]))
+                humidities.append(float(row[2]))
+
+
+# Simulation function to generate a whole access period's worth of simulated temperature and humidity data
+def generate_simulated_batch(count):
+    """
+    Function to generate count readings of simulated temperature and humidity data in one go, temperature within the
+    range of 15 to 25 degrees Celsius and humidity within the range of 40% to 60%.
+
+    :param count: number of readings to generate, as int
 
-    :return: Tuple of simulated temperature and humidity data.
+    :return: Tuple of a list of simulated temperature data and a list of simulated humidity data.
     """
-    # Simulate temperature within range of 15 to 25 degrees Celsius
-    temperature = round(random.uniform(15, 25), 2)
+    uniform = random.uniform
+    temperatures = [round(uniform(15, 25), 2) for _ in range(count)]
+    humidities = [round(uniform(40, 60), 2) for _ in range(count)]
 
-    # Simulate humidity within range of 40% to 60%
-    humidity = round(random.uniform(40, 60), 2)
+    return temperatures, humidities
 
-    return temperature, humidity
+
+# Function to format a time of day given as seconds since midnight
+def format_time_of_day(seconds):
+    """
+    Function to format a time of day as "HH:MM:SS", equivalent to time.strftime("%H:%M:%S") but without the need
+    for a time.localtime() call for every timestamp.
+
+    :param seconds: seconds since midnight, as int, values of a day or more wrap around
+
+    :return: formatted time of day, as string
+    """
+    return "%02d:%02d:%02d" % (seconds // 3600 % 24, seconds // 60 % 60, seconds % 60)
 
 
 # Main program entrance function
-def main():
+async def main():
     """
-    Main function
+    Main function, a coroutine so the waits between data readings and between access periods hand control back to
+    the event loop rather than blocking, any other tasks (such as reading from a sensor) can run during these waits
     """
     print()
     print("Sample solution for CET235 PPW1 Desktop Application")
@@ -252,8 +335,11 @@ def main():
 
     # Simulate access periods and record data
     for _ in range(3):  # Simulating three access periods
-        # Simulate start time
-        start_time = time.strftime("%H:%M:%S", time.localtime())
+        # Simulate start time, the local time is only read once per access period and the timestamps of the data
+        # readings (taken 1 second apart) are worked out from it
+        now = time.localtime()
+        start_seconds = now.tm_hour * 3600 + now.tm_min * 60 + now.tm_sec
+        start_time = format_time_of_day(start_seconds)
         start_date = "12th May 2021"
 
         # Simulate access period duration
@@ -262,13 +348,13 @@ def main():
         # Record start time of access period
         print("Access started at:", start_time)
 
-        # Simulate and record temperature and humidity data for the access period
-        for _ in range(access_duration):
-            # Generate simulated temperature and humidity data
-            temperature, humidity = generate_simulated_data()
+        # Generate all of the simulated temperature and humidity data for the access period up front
+        temperatures, humidities = generate_simulated_batch(access_duration)
 
+        # Simulate and record temperature and humidity data for the access period
+        for i, (temperature, humidity) in enumerate(zip(temperatures, humidities)):
             # Record the data
-            timestamp = time.strftime("%H:%M:%S", time.localtime())
+            timestamp = format_time_of_day(start_seconds + i)
             data_reading = DataReading(timestamp, temperature, humidity)
 
             # Print and add the data reading to the access period
@@ -277,10 +363,10 @@ def main():
             # access_period.add_data_reading(data_reading)
 
             # Sleep for 1 second to simulate real-time data acquisition
-            time.sleep(1)
+            await asyncio.sleep(1)
 
         # Simulate stop time
-        stop_time = time.strftime("%H:%M:%S", time.localtime())
+        stop_time = format_time_of_day(start_seconds + access_duration)
 
         # Record stop time of access period
         print("Access stopped at:", stop_time)
@@ -290,7 +376,7 @@ def main():
         # access_periods.add_access_period(access_period)
 
         # Sleep for 10 seconds between access periods to simulate intervals
-        time.sleep(10)
+        await asyncio.sleep(10)
 
     # Exit application
     print("Finished")
@@ -299,4 +385,4 @@ def main():
 # Invoke main() program entrance
 if __name__ == "__main__":
     # execute only if run as a script
-    main()
+    asyncio.run(main())
@@ -4,10 +4,37 @@
 # Date: Jan 2019
 
 # Imports
+import array
 import os
-from time import sleep
+import struct
+import time
 from iot_app import IoTApp
 from bme680 import BME680, OS_2X, OS_4X, OS_8X, FILTER_SIZE_3, ENABLE_GAS_MEAS
+try:
+    import uasyncio as asyncio
+except ImportError:
+    import asyncio
+
+# Constants
+COUNT_TARGET = 100  # Number of sets of sensor readings to take before the app is finished
+RING_SIZE = 4096  # Size in bytes of the ring buffer of records waiting to be written to the
+                  # rtc_3.dat file, a power of two so RING_MASK turns a count into a position
+RING_MASK = RING_SIZE - 1
+FLUSH_AT = 1024  # Number of waiting bytes at which the flusher task writes out the ring buffer
+BATCH_SIZE = 10  # Number of sets of sensor readings written to the rtc_3.dat file as one record
+
+# Functions
+def bme680_measure_duration(humidity_os, pressure_os, temperature_os, heater_ms):
+    """
+    Returns the number of milliseconds the BME680 takes to make one set of readings for the
+    supplied oversampling counts (1, 2, 4, 8 or 16 samples) and gas heater duration, using
+    the formula from the Bosch BME680 datasheet/API
+    """
+    # Each oversampled measurement takes 1963 microseconds, plus a fixed 477 microseconds for
+    # each of the temperature/pressure/humidity switches (4), the gas measurement (5) and 1000
+    # microseconds to wake up
+    duration_us = (humidity_os + pressure_os + temperature_os) * 1963 + 477 * 9 + 1000
+    return (duration_us + 999) // 1000 + heater_ms
 
 # Classes
 class MainApp(IoTApp):
@@ -49,111 +76,160 @@ class MainApp(IoTApp):
         self.obtain_sensor_bme680()
         
         # Name of the file to write to the Huzzah32's root file system
-        self.file_name = "rtc_3.csv"
+        self.file_name = "rtc_3.dat"
         
-        # If the file rtc_3.csv already exists on the root of the Huzzah32's file system then
+        # If the file rtc_3.dat already exists on the root of the Huzzah32's file system then
         # first remove it (otherwise it will be appended to since the file is openned using
-        # the "w+" flag, use the file_exists() method to check this and then remove if
+        # the "wb+" flag, use the file_exists() method to check this and then remove if
         # necessary
         if self.file_exists(self.file_name):
             os.remove(self.file_name)
         
         # Open file for appending, note you could open the file simply for writing using the
         # flag "w" but then if a file of the same name is already on the file system it will
-        # always be overwritten (so be careful)
-        self.file = open(self.file_name, "w+")
+        # always be overwritten (so be careful), the file is opened in binary mode ("b") as
+        # binary records are written to it
+        self.file = open(self.file_name, "wb+")
 
-        # Counter to count 10 sensor data readings written to rtc_3.csv file 
-        self.count = 0
+        # Number of sets of sensor readings to take, the app is finished by a task (started by the
+        # first loop()) once this many sample periods have passed rather than loop() counting the
+        # readings and checking the count every time
+        self.finish_task = None
+        
+        # Records waiting to be written to the rtc_3.dat file are held as bytes in a ring buffer,
+        # loop() only ever copies a record into the ring buffer and a separate task (started by the
+        # first loop()) writes them all out once FLUSH_AT bytes have built up, so a slow write to
+        # the Huzzah32's flash file system never delays taking the next sensor readings, head and
+        # tail count the bytes taken out of and put into the ring buffer
+        self.ring = bytearray(RING_SIZE)
+        self.head = 0
+        self.tail = 0
+        self.flush_event = asyncio.Event()
+        self.flusher_task = None
+        
+        # Batch of readings waiting to be added to the ring buffer as a single record, one array
+        # per reading (already scaled to whole numbers) plus the timestamps of the first and last
+        # readings and how many readings are in the batch so far
+        self.batch_tm = array.array("h", [0] * BATCH_SIZE)
+        self.batch_pa = array.array("H", [0] * BATCH_SIZE)
+        self.batch_rh = array.array("H", [0] * BATCH_SIZE)
+        self.batch_gr = array.array("H", [0] * BATCH_SIZE)
+        self.batch_begin = 0
+        self.batch_end = 0
+        self.batch_count = 0
+        
+        # Set by finish() so loop() stops waiting for the next sensor readings straight away when
+        # Button C is pressed, on the Huzzah32 a ThreadSafeFlag can be set directly from the button
+        # handler, on the desktop the button handler runs in the GUI thread so the flag is an Event
+        # that is set through the event loop (recorded by the first loop()) instead
+        if hasattr(asyncio, "ThreadSafeFlag"):
+            self.finish_flag = asyncio.ThreadSafeFlag()
+        else:
+            self.finish_flag = asyncio.Event()
+        self.event_loop = None
+        
+        # Readings last shown on the OLED screen, used by loop() to skip redrawing the screen when
+        # nothing shown on it would change
+        self._last_disp = None
     
-    def loop(self):
+    async def loop(self):
         """
         The loop() method is called after the init() method and is designed to contain
         the part of the program which continues to execute until the finished property
-        is set to True
+        is set to True, as it is defined with async the IoTApp runs it on an asyncio event
+        loop so it can wait using await rather than blocking
         """
-        # Check to see if 10 data readings have been taken, if so then finish the app and return
-        # from the loop() method
-        if self.count >= 100:
-            self.finish()
-            return
-            
-        self.oled_clear()
+        # Start the task that writes the records to the rtc_3.dat file and the task that finishes
+        # the app after COUNT_TARGET sample periods, this has to be done here as init() is not run
+        # on the event loop
+        if self.flusher_task is None:
+            self.flusher_task = asyncio.create_task(self.flusher())
+            self.finish_task = asyncio.create_task(
+                self.finish_after(COUNT_TARGET * self.sample_period_ms))
+            if not hasattr(asyncio, "ThreadSafeFlag"):
+                self.event_loop = asyncio.get_running_loop()
 
-        # If sensor readings are available, read them once a second or so
+        # If sensor readings are available, read them, loop() waits for the BME680 to make a new
+        # set of readings between each call so these should always be available
         if self.sensor_bme680.get_sensor_data():
-            tm_reading = self.sensor_bme680.data.temperature  # In degrees Celsius 
-            pa_reading = self.sensor_bme680.data.pressure     # In Hectopascals (1 hPa = 100 Pascals)
-            rh_reading = self.sensor_bme680.data.humidity     # As a percentage (ie. relative humidity)
+            # Look up the sensor data object once rather than for every reading
+            data = self.sensor_bme680.data
+            tm_reading = data.temperature  # In degrees Celsius 
+            pa_reading = data.pressure     # In Hectopascals (1 hPa = 100 Pascals)
+            rh_reading = data.humidity     # As a percentage (ie. relative humidity)
 
             # The VOC gas sensor needs a short time (aorund 20-30 milliseconds) to warm up,
             # until then output a message to state it is stablising, the gas reading is provided in
             # electrical resistance (ohms) measrued across the sensor and is not very useful on its own,
             # it needs to be compared to previous readings to make any use of this value, it is included
             # here to show how to read it but you will not be directly using this data in the future
-            if self.sensor_bme680.data.heat_stable:
-                gr_reading = self.sensor_bme680.data.gas_resistance
+            if data.heat_stable:
+                gr_reading = data.gas_resistance
             else:
                 gr_reading = None
                     
-            output = "{0:.2f}c, {1:.0f}hpa".format(tm_reading, pa_reading)
-            self.oled_text(output, 0, 0)
-               
-            output = "{0:.2f}%rh".format(rh_reading)
-            self.oled_text(output, 0, 10)
+            # Only redraw the OLED screen when the readings, to the precision they are shown, have
+            # changed since they were last displayed, each redraw sends the whole screen to the OLED
+            # FeatherWing
+            key = (round(tm_reading * 100), round(pa_reading), round(rh_reading * 100),
+                   round(gr_reading) if gr_reading else None)
+            if key != self._last_disp:
+                self._last_disp = key
                 
-            # The VOC gas sensor needs a short time (aorund 20-30 milliseconds) to warm up,
-            # until then output a message to state it is stablising
-            if gr_reading:
-                output = "{0:.0f}ohms".format(gr_reading)
-            else:
-                output = "***stablising****"            
-            self.oled_text(output, 0, 20)
+                # The VOC gas sensor needs a short time (aorund 20-30 milliseconds) to warm up,
+                # until then output a message to state it is stablising
+                self.oled_screen(((f"{tm_reading:.2f}c, {pa_reading:.0f}hpa", 0, 0),
+                                  (f"{rh_reading:.2f}%rh", 0, 10),
+                                  (f"{gr_reading:.0f}ohms" if gr_reading else "***stablising****", 0, 20)))
             
-            # Write the current BME680 data to a single line in the rtc_3.csv file with each sensor value
-            # as the comma separated values in the form:-
-            #
-            #       timestamp, temperature, pressure, humidity, gas
+            # Add the current BME680 data to the batch of readings, once BATCH_SIZE readings have been
+            # added the batch is written to the rtc_3.dat file as a single binary record (so the
+            # timestamps and record framing are shared across the whole batch) in the form:-
             #
-            # timestamp is of the form:-
+            #       first timestamp, last timestamp, count, temperatures, pressures, humidities, gases
             #
-            #       YYYY-MM-DD|hh:mm:ss
+            # packed least significant byte first where:-
             #
-            # the date and time for this timestamp is taken from the self.rtc real-time clock instance that
-            # is available in the IoTApp class (and therefore also in your class)
+            #       first/last timestamp are seconds since the epoch (1st January 2000 on the Huzzah32)
+            #                            of the first and last readings in the batch, as 4 byte
+            #                            unsigned ints
+            #       count is the number of readings in the batch, as a 2 byte unsigned int
+            #       temperatures are count x degrees Celsius x 100, as 2 byte signed ints
+            #       pressures are count x hectopascals, as 2 byte unsigned ints
+            #       humidities are count x percentage relative humidity x 100, as 2 byte unsigned ints
+            #       gases are count x ohms / 16, as 2 byte unsigned ints
             #
-            # Note: the \n at the end of each data line string is the new line character to ensure the
-            # data.csv file has each sensor data readings on separate lines, also ensure that if the gas
-            # reading is None (i.e. not yet ready) then record the value 0 for this
+            # the date and time for the timestamps is taken from the self.rtc real-time clock instance
+            # that is available in the IoTApp class (and therefore also in your class), also ensure that
+            # if the gas reading is None (i.e. not yet ready) then record the value 0 for this
             gr_reading = gr_reading if gr_reading else 0.0
             
-            # Current date and time taken from the real-time clock
+            # Current date and time taken from the real-time clock, the tuple is in the form (year,
+            # month, day, day number, hour, minute, seconds, microseconds), time.mktime() needs the
+            # date and time in the form (year, month, day, hour, minute, seconds, day number, day of
+            # year, daylight saving) where 0, 0, -1 for the last three mean not known
             now = self.rtc.datetime()
-            year = now[0]
-            month = now[1]
-            day = now[2]
-            hour = now[4]
-            minute = now[5]
-            second = now[6]
-
-            # Format timestamp
-            timestamp = "{0}-{1}-{2} , {3}:{4}:{5}".format(year, month, day, hour, minute, second)
+            timestamp = int(time.mktime((now[0], now[1], now[2], now[4], now[5], now[6], 0, 0, -1)))
 
-            # Format line of data
-            data_line = "{0},{1:.2f},{2:.0f},{3:.2f},{4:.0f}\n".format(timestamp, tm_reading, pa_reading,
-                                                                       rh_reading, gr_reading)
-            
-            # Write data line to the rtc_3.csv file
-            self.file.write(data_line)
-
-            # Increment the counter if a reading is taken
-            self.count += 1
-                
-        # Display the sensor readings on the OLED screen 
-        self.oled_display()
+            # Add the readings to the batch and write it out once it is full
+            n = self.batch_count
+            if n == 0:
+                self.batch_begin = timestamp
+            self.batch_end = timestamp
+            self.batch_tm[n] = round(tm_reading * 100)
+            self.batch_pa[n] = round(pa_reading)
+            self.batch_rh[n] = round(rh_reading * 100)
+            self.batch_gr[n] = min(round(gr_reading / 16), 0xFFFF)
+            self.batch_count = n + 1
+            if self.batch_count == BATCH_SIZE:
+                self.put_batch()
 
-        # Try tp take readings once every second or so
-        sleep(1)
+        # Wait for the BME680 to make the next set of readings, handing control back to the event
+        # loop rather than blocking while waiting, the wait ends early if the app is finished
+        try:
+            await asyncio.wait_for(self.finish_flag.wait(), self.sample_period_ms / 1000)
+        except asyncio.TimeoutError:
+            pass
     
     def deinit(self):
         """
@@ -162,8 +238,94 @@ class MainApp(IoTApp):
         properties, for instance shutting down sensor devices. It can also be used to
         display final information on output devices (such as the OLED FeatherWing)
         """
-        # Make sure the rtc_3.csv file is closed
+        # Write any readings and records still waiting to be written and make sure the rtc_3.dat
+        # file is closed, the flusher task has already stopped along with the event loop
+        self.put_batch()
+        self.ring_flush()
         self.file.close()
+    
+    def finish(self):
+        """
+        Overrides the inherited finish() method to also wake up loop() if it is waiting for
+        the next sensor readings
+        """
+        IoTApp.finish(self)
+        if self.event_loop is None:
+            self.finish_flag.set()
+        elif not self.event_loop.is_closed():
+            # The event loop is closed once loop() has stopped (e.g. if Button C is pressed while
+            # the app is closing down) and there is then nothing left to wake up
+            self.event_loop.call_soon_threadsafe(self.finish_flag.set)
+    
+    def put_batch(self):
+        """
+        Adds the batch of readings to the ring buffer as a single record (in the form described
+        in loop()), wakes up the flusher task if enough bytes are waiting in the ring buffer and
+        starts a new empty batch
+        """
+        n = self.batch_count
+        if not n:
+            return
+        
+        # The arrays hold their values least significant byte first on the Huzzah32 (and on the
+        # desktop) so their bytes are copied straight into the record
+        self.ring_put(struct.pack("<IIH", self.batch_begin, self.batch_end, n))
+        for readings in (self.batch_tm, self.batch_pa, self.batch_rh, self.batch_gr):
+            self.ring_put(bytes(readings)[:2 * n])
+        self.batch_count = 0
+        
+        if self.tail - self.head >= FLUSH_AT:
+            self.flush_event.set()
+    
+    def ring_put(self, data):
+        """
+        Copies the supplied bytes into the ring buffer, wrapping around to the start of the
+        ring buffer if necessary, if there is not enough room the ring buffer is written to
+        the rtc_3.dat file first
+        """
+        n = len(data)
+        if self.tail - self.head + n > RING_SIZE:
+            self.ring_flush()
+        
+        pos = self.tail & RING_MASK
+        first = min(n, RING_SIZE - pos)
+        self.ring[pos:pos + first] = data[:first]
+        self.ring[:n - first] = data[first:]
+        self.tail += n
+    
+    def ring_flush(self):
+        """
+        Writes everything waiting in the ring buffer to the rtc_3.dat file and empties the
+        ring buffer, this is one write (or two if the waiting bytes wrap around the end of the
+        ring buffer)
+        """
+        n = self.tail - self.head
+        if n:
+            mv = memoryview(self.ring)
+            pos = self.head & RING_MASK
+            if pos + n <= RING_SIZE:
+                self.file.write(mv[pos:pos + n])
+            else:
+                self.file.write(mv[pos:])
+                self.file.write(mv[:n - (RING_SIZE - pos)])
+            self.head = self.tail
+    
+    async def finish_after(self, ms):
+        """
+        Task that finishes the app once the supplied number of milliseconds have passed
+        """
+        await asyncio.sleep(ms / 1000)
+        self.finish()
+    
+    async def flusher(self):
+        """
+        Task that writes the ring buffer to the rtc_3.dat file each time loop() signals that
+        enough records are waiting
+        """
+        while True:
+            await self.flush_event.wait()
+            self.flush_event.clear()
+            self.ring_flush()
         
     def obtain_sensor_bme680(self):
         """
@@ -200,17 +362,24 @@ class MainApp(IoTApp):
         self.sensor_bme680.set_gas_heater_duration(150)
         self.sensor_bme680.select_gas_heater_profile(0)  # Default to settings given above
         
+        # Work out how long the BME680 takes to make a new set of readings with the settings
+        # above (2x humidity, 4x pressure, 8x temperature and 150 milliseconds of gas heater),
+        # loop() waits exactly this long between readings so it never asks for readings before
+        # the BME680 has any new ones ready
+        self.sample_period_ms = bme680_measure_duration(2, 4, 8, 150)
+        
     def file_exists(self, file_name):
         """
         Returns True if the file (does not work with directories) with the supplied name
         exists in the current directory, otherwise returns False
         """
-        # Get the name of all files in the current directory on the Huzzah32's file system
-        # using the os.listdir() function
-        file_names = os.listdir()
-        
-        # Return True if supplied file name is in the files list, otherwise return False
-        return file_name in file_names
+        # os.stat() raises OSError if nothing of this name is on the Huzzah32's file system
+        try:
+            mode = os.stat(file_name)[0]
+        except OSError:
+            return False
+
+        return not mode & 0x4000
 
 # Program entrance function
 def main():
@@ -7,6 +7,10 @@
 from iot_app import IoTApp
 from machine import RTC  # Real-time clock class is in the machine module
 
+# Constants
+DAY_NAMES = ("Mon", "Tue", "Wed", "Thu", "Fri", "Sat", "Sun")  # Day names to use in place of
+                                                               # the day number
+
 # Classes
 class MainApp(IoTApp):
     """
@@ -52,9 +56,10 @@ class MainApp(IoTApp):
         #
         # and then use this property whenever you need access to the real-time clock
         
-        # Provide a list of day names to use in place of the day number
-        self.day_names = ["Mon","Tue","Wed","Thu","Fri","Sat","Sun"]
-        
+        # The day names to use in place of the day number are in the DAY_NAMES tuple at the top
+        # of this file, this is made once when the file is loaded rather than every time an app
+        # instance is initialised
+        #
         # The IoTApp class also provides a static property that contains the full names of 
         # each day, to access this use:-
         #
@@ -88,7 +93,7 @@ class MainApp(IoTApp):
         month = now[1]
         day = now[2]
         day_number = now[3]
-        day_name = self.day_names[day_number]
+        day_name = DAY_NAMES[day_number]
         #day_name = IoTApp._DAY_NAMES[day_number][:3]  # Alternative approach
         hour = now[4]
         minute = now[5]
@@ -6,6 +6,7 @@
 
 # Imports
 import network
+import select
 import socket
 from libs.iot_app import IoTApp
 
@@ -75,24 +76,20 @@ class MainApp(IoTApp):
 
         # Create a server socket using the current IP address of the connection and on port
         # number 2350, this is done by the socket's bind() method
-        sckt = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-        sckt.bind((ip_address, 2350))  # Note: passed in as 2-tuple here
-        sckt.listen(5)  # Listen for clients to connect to this server (upto 5 at a time)
+        self.sckt = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        # Allow the port to be bound again straight away if the server is restarted, rather than
+        # waiting for the previous server socket to time out
+        self.sckt.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self.sckt.bind((ip_address, 2350))  # Note: passed in as 2-tuple here
+        self.sckt.listen(5)  # Listen for clients to connect to this server (upto 5 at a time)
         
-        # Wait until a client tries to connect, accept this connection and then send a message
-        # to that client, repeat this forever, to abort the server you will have to remove the
-        # USB power to the Huzzah32
-        while True:
-            client_sckt, client_ip_address = sckt.accept()  # When a client tries to connect
-                                                            # then accept it, recording the
-                                                            # socket created for this client
-                                                            # and the client IP address
-                                                            
-            # Can only send byte stream on the socket so convert (encode) the message as string
-            # into a stream of bytes and send that
-            msg_as_string = "I'm connected!!!"
-            msg_as_bytes = bytes(msg_as_string, "utf-8")
-            client_sckt.send(msg_as_bytes)
+        # Set the server socket to be non-blocking, accept() then raises an OSError straight away
+        # when there are no more clients waiting to connect rather than waiting for one
+        self.sckt.setblocking(False)
+        
+        # Can only send byte stream on the socket so the message is held as bytes, this is done
+        # once here rather than converting (encoding) the message every time a client connects
+        self.greeting = b"I'm connected!!!"
         
     def loop(self):
         """
@@ -100,7 +97,36 @@ class MainApp(IoTApp):
         the part of the program which continues to execute until the finished property
         is set to True
         """
-        pass
+        # Wait (for up to a tenth of a second) until a client tries to connect, select() returns
+        # as soon as the server socket has a client waiting so the wait does not delay clients,
+        # and returning to the IoTApp execution loop each time means pressing Button C finishes
+        # the server
+        readable, _, _ = select.select([self.sckt], [], [], 0.1)
+        if not readable:
+            return
+        
+        # Accept every client that is waiting to connect and send a message to each client
+        while True:
+            try:
+                client_sckt, client_ip_address = self.sckt.accept()  # When a client tries to
+                                                                     # connect then accept it,
+                                                                     # recording the socket
+                                                                     # created for this client
+                                                                     # and the client IP address
+            except OSError:
+                # No more clients waiting to connect
+                break
+            
+            # On some platforms the client socket is non-blocking like the server socket, make
+            # sure send() waits until the whole message is sent
+            client_sckt.setblocking(True)
+            
+            # Send the message and then close the client socket, each client socket uses up one of
+            # the few sockets available on the Huzzah32 until it is closed
+            try:
+                client_sckt.send(self.greeting)
+            finally:
+                client_sckt.close()
     
     def deinit(self):
         """
@@ -109,9 +135,8 @@ class MainApp(IoTApp):
         properties, for instance shutting down sensor devices. It can also be used to
         display final information on output devices (such as the OLED FeatherWing)
         """
-        # In this specific implementation the deint() method does nothing, only included
-        # for completeness sake
-        pass
+        # Close the server socket so no more clients can connect
+        self.sckt.close()
 
 # Program entrance function
 def main():
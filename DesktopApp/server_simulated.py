@@ -5,12 +5,18 @@
 # Date: Apr 2020
 
 # Imports
-import socket
-from time import sleep
+import asyncio
 from iot_app import IoTApp
 from machine import Pin
 from neopixel import NeoPixel
 
+# Constants
+MSG = b"I'm connected!!!"  # Message sent to each client, can only send byte stream on the
+                           # socket so this is held as bytes rather than converting (encoding)
+                           # a string for every client
+STEPS = 32  # Number of colour steps the NeoPixels move through from blue to red, one step for
+            # each client that connects before starting again at blue
+
 # Classes
 class MainApp(IoTApp):
     """
@@ -45,9 +51,7 @@ class MainApp(IoTApp):
                                                       # to connect
         
         # Display an OLED message to state that connection is being attempted
-        self.oled_clear()
-        self.oled_text("Attempt connect", 0, 10)
-        self.oled_display()
+        self.oled_screen((("Attempt connect", 0, 10),))
 
         # Once a connection has been made then the detials of how the connection was set up
         # and the resulting WLAN object instance are available in the properties:-
@@ -71,17 +75,16 @@ class MainApp(IoTApp):
 
         # Display message to state that WLAN has connected and also show the IP address
         # allocated by the Wi-Fi router
-        self.oled_clear()
-        self.oled_text("IP Address:", 0, 10)
-        self.oled_text("{0}".format(ip_address), 0, 20)
-        self.oled_display()
+        self.oled_screen((("IP Address:", 0, 10), (ip_address, 0, 20)))
 
-        # Create a server socket using the current IP address of the connection and on port
-        # number 2350, this is done by the socket's bind() method
-        sckt = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-        sckt.bind((ip_address, 2350))  # Note: passed in as 2-tuple here
-        sckt.listen(5)  # Listen for clients to connect to this server (upto 5 at a time)
-        
+        # Make note of the IP address so loop() can start the server on it
+        self.ip_address = ip_address
+        self.server = None
+
+        # Task that redraws the NeoPixels and the queue that handle_client() passes it colour
+        # steps through, both made alongside the server in loop() as they belong on the event loop
+        self.render_task = None
+        self.colour_queue = None
         
         # Pin 21 is connected to the NeoPixel FeatherWing via a jumper wire, note: the
         # instance of pin 21 is taken from the property ProtoRig instance 
@@ -105,48 +108,97 @@ class MainApp(IoTApp):
         self.npm.write()
         
         
-        tm_factor=0
-        # Wait until a client tries to connect, accept this connection and then send a message
-        # to that client, repeat this forever, to abort the server you will have to remove the
-        # USB power to the Huzzah32
-        while True:
-            client_sckt, client_ip_address = sckt.accept()  # When a client tries to connect
-                                                            # then accept it, recording the
-                                                            # socket created for this client
-                                                            # and the client IP address
-                                                            
-            # Can only send byte stream on the socket so convert (encode) the message as string
-            # into a stream of bytes and send that
-            msg_as_string = "I'm connected!!!"
-            msg_as_bytes = bytes(msg_as_string, "utf-8")
-            client_sckt.send(msg_as_bytes)
-            
-            # Calculate the factor the actual temperature reading contributes to the colour channels
-            tm_factor += 1
+        # Colour step reached by the clients that have connected, used to change the colour of
+        # the NeoPixels each time a client connects, kept between 0 and STEPS - 1 so it never
+        # grows however many clients connect
+        self.tm_factor = 0
+
+        # Work out the colour for every step once here rather than each time a client connects,
+        # the blue channel is maximum (255) at the first step and the red channel is maximum (255)
+        # at the last step, note: the green colour channel is not used (it remains 0) and the
+        # simulated NeoPixel has no byte buffer to copy into so each entry is an (r, g, b) tuple
+        self.colours = tuple((int(255 * step / (STEPS - 1)), 0, int(255 * (1 - step / (STEPS - 1))))
+                             for step in range(STEPS))
+        
+    async def handle_client(self, reader, writer):
+        """
+        Called by the server for each client that connects, sends a message to the client and
+        then moves the NeoPixels on to the next colour, many clients can be handled at the same time
+        as each one waits using await rather than blocking
+        """
+        # Send the message and then close the connection to the client, there is no need to wait
+        # for the message to drain first as close() sends anything still buffered before the
+        # connection is shut down, so the message and the close go out together
+        writer.write(MSG)
+        writer.close()
+        await writer.wait_closed()
+        
+        # Move on to the next colour step, wrapping back round to blue after the last step, and
+        # hand it to render() through the queue, the queue only holds one step so if render() has
+        # not taken the last one yet it is thrown away and replaced by this newer one, only the
+        # latest colour matters and handle_client() never has to wait for the NeoPixels
+        self.tm_factor = (self.tm_factor + 1) % STEPS
+        try:
+            self.colour_queue.put_nowait(self.tm_factor)
+        except asyncio.QueueFull:
+            self.colour_queue.get_nowait()
+            self.colour_queue.put_nowait(self.tm_factor)
 
-            # Blue channel is maximum (255) when actual temperature is at 20c, make sure this value
-            # ends up an integer
-            blue_channel = int(255 * (1 - tm_factor))
+    async def render(self):
+        """
+        Runs alongside the server, waits for colour steps from handle_client() on the queue and
+        writes the NeoPixels at most 60 times a second, so accepting clients is never held up
+        waiting on the NeoPixels
+        """
+        # The colour step last written to the NeoPixels, if enough clients connect during one
+        # frame to come all the way round to the same step again there is nothing to redraw
+        last_colour = None
 
-            # Red channel is maximum (255) when actual temperature is at 35c, make sure this value
-            # ends up an integer
-            red_channel = int(255 * tm_factor)
+        # Look up the methods and table used every frame just the once and keep them as local
+        # variables, reading a local is quicker than looking up an attribute on self each time
+        sleep = asyncio.sleep
+        fill = self.npm.fill
+        write = self.npm.write
+        colours = self.colours
+        get = self.colour_queue.get
 
-            # Use NeoPixel.fill() method to set NeoPixels to the calculated colour channels, note: the
-            # green colour channel is not used (it remains 0)
-            self.npm.fill((red_channel, 0, blue_channel))
-            # You must use NeoPixel.write() method when you want the matrix to change
-            self.npm.write()
-            sleep(0.1)
-            
+        while True:
+            colour = await get()
+            if colour != last_colour:
+                last_colour = colour
+                # Use NeoPixel.fill() method to set NeoPixels to the precomputed colour for the
+                # latest step
+                fill(colours[colour])
+                # You must use NeoPixel.write() method when you want the matrix to change
+                write()
+                # Wait out the rest of the frame, any clients that connect meanwhile just replace
+                # the step waiting in the queue so they all share the next write
+                await sleep(1 / 60)
         
-    def loop(self):
+    async def loop(self):
         """
         The loop() method is called after the init() method and is designed to contain
         the part of the program which continues to execute until the finished property
-        is set to True
+        is set to True, as it is defined with async the IoTApp runs it on an asyncio event
+        loop so it can wait using await rather than blocking
         """
-        pass
+        # Start a server using the current IP address of the connection and on port number 2350
+        # the first time around, this has to be done here as init() is not run on the event loop,
+        # the server accepts clients and calls handle_client() for each one in the background
+        # (upto 5 waiting to be accepted at a time)
+        if self.server is None:
+            self.colour_queue = asyncio.Queue(maxsize=1)
+            self.server = await asyncio.start_server(self.handle_client, self.ip_address, 2350,
+                                                     backlog=5)
+            self.render_task = asyncio.create_task(self.render())
+        
+        # Check every tenth of a second if the app has finished (Button C pressed) and if so then
+        # stop the server
+        await asyncio.sleep(0.1)
+        if self.finished:
+            self.server.close()
+            await self.server.wait_closed()
+            self.render_task.cancel()
     
     def deinit(self):
         """
@@ -5,6 +5,7 @@
 
 # Imports
 import network
+from time import sleep
 from iot_app import IoTApp
 
 # Classes
@@ -47,12 +48,13 @@ class MainApp(IoTApp):
         wifi.connect("DCETLocalVOIP", "")
 
         # Display an OLED message to state that connection is being attempted
-        self.oled_clear()
-        self.oled_text("Attempt connect", 0, 10)
-        self.oled_display()
+        self.oled_screen((("Attempt connect", 0, 10),))
         
-        while not wifi.isconnected():  # Busy waiting for a connection
-            pass
+        # Wait for a connection, checking every 50 milliseconds and sleeping in between rather
+        # than spinning on isconnected() so the processor is free for the Wi-Fi work while waiting,
+        # init() is not run on an event loop so this is a plain sleep() not an await
+        while not wifi.isconnected():
+            sleep(0.05)
             
         # Make note of the IP address allocated by the Wi-Fi router, this is achieved by use
         # of the ifconfig() method of the WLAN object which returns a 4-tuple with details of
@@ -62,10 +64,7 @@ class MainApp(IoTApp):
 
         # Display message to state that WLAN has connected and also show the IP address
         # allocated by the Wi-Fi router
-        self.oled_clear()
-        self.oled_text("Connected", 0, 10)
-        self.oled_text("{0}".format(ip_address), 0, 20)
-        self.oled_display()
+        self.oled_screen((("Connected", 0, 10), (ip_address, 0, 20)))
         
     def loop(self):
         """
@@ -5,11 +5,57 @@
 
 # Imports
 import os
-from time import sleep
 from libs.iot_app import IoTApp
-from libs.bme680 import BME680, OS_2X, OS_4X, OS_8X, FILTER_SIZE_3, ENABLE_GAS_MEAS
+from libs.bme680 import BME680, OS_2X, OS_4X, OS_8X, FILTER_SIZE_3, DISABLE_GAS_MEAS
 from neopixel import NeoPixel
 from machine import Pin
+try:
+    import micropython
+    from micropython import const
+    from time import sleep_ms, ticks_add, ticks_diff, ticks_ms
+except ImportError:
+    # Not running under MicroPython (e.g. with the simulator on a desktop computer) so plain Python
+    # stand-ins are used, const() just returns its value, @micropython.native leaves the method
+    # as it is and the ticks_ms() clock is made from time.monotonic()
+    from time import monotonic, sleep
+
+    class micropython:
+        native = staticmethod(lambda function: function)
+
+    const = lambda value: value
+    ticks_ms = lambda: int(monotonic() * 1000)
+    ticks_add = lambda ticks, delta: ticks + delta
+    ticks_diff = lambda ticks_1, ticks_2: ticks_1 - ticks_2
+    sleep_ms = lambda ms: sleep(ms / 1000)
+try:
+    from datetime import datetime
+except ImportError:
+    datetime = None  # There is no datetime module on the Huzzah32, it is only needed by the
+                     # process_access_data() method which is run on a desktop computer
+
+# Constants
+LED_COLOURS = ((0, 10, 0),  # Green colour, for the first 5 seconds of an access period
+               (10, 7, 0),  # Orange/amber colour, after 5 seconds but less than 10 seconds
+               (10, 0, 0))  # Red colour, after 10 seconds
+# Complete NeoPixel buffer contents for each of the LED_COLOURS (and for all off), worked out once
+# when the module is loaded so changing colour is a single copy into the NeoPixel buffer rather
+# than NeoPixel.fill() setting each of the 32 NeoPixels in turn, the NeoPixel FeatherWing holds
+# each NeoPixel as green, red, blue bytes so the channels are swapped round to match
+LED_FRAMES = tuple(bytes((green, red, blue)) * 32 for red, green, blue in LED_COLOURS)
+OFF_FRAME = bytes(3 * 32)
+DIGITS_2 = tuple(b"%02d" % number for number in range(100))  # Two digit byte strings for 0..99,
+                                                              # used to fill in the timestamp
+BUFFER_SIZE = const(4096)  # Number of bytes held back before writing to the access_data.csv file,
+                          # this is the size of one erase block of the Huzzah32's flash memory (8
+                          # sectors of the file system) so each write fills a whole block rather
+                          # than reworking the same block several times, any data still held back
+                          # is written as soon as an access period starts or stops so at most the
+                          # readings of the current access period are lost if the power is cut,
+                          # const() lets MicroPython put the number straight into the code where it
+                          # is used rather than looking it up each time
+ACCESS_STARTED = b"ACCESS-STARTED,"  # Start of the lines written to the access_data.csv file when
+ACCESS_STOPPED = b"ACCESS-STOPPED,"  # an access period starts and stops, held as bytes as that is
+                                     # how the file is written
 
 # Classes
 class MainApp(IoTApp):
@@ -89,15 +135,46 @@ class MainApp(IoTApp):
         
         # If the file access_data.csv already exists on the root of the Huzzah32's file system then
         # first remove it (otherwise it will be appended to since the file is openned using
-        # the "w+" flag, use the file_exists() method to check this and then remove if
+        # the "wb+" flag, use the file_exists() method to check this and then remove if
         # necessary
         if self.file_exists(self.file_name):
             os.remove(self.file_name)
         
         # Open file for appending, note you could open the file simply for writing using the
         # flag "w" but then if a file of the same name is already on the file system it will
-        # always be overwritten (so be careful)
-        self.file = open(self.file_name, "w+")
+        # always be overwritten (so be careful), the "b" means the file is written as bytes rather
+        # than strings so the timestamp below can be written straight from its bytearray
+        self.file = open(self.file_name, "wb+")
+
+        # The timestamp written at the start of each data line, this is made once here and then each
+        # second the digits are changed in place rather than building a new string, the bytes at
+        # positions 0..3 are the year, 5..6 the month, 8..9 the day, 11..12 the hour, 14..15 the
+        # minute and 17..18 the second
+        self.timestamp = bytearray(b"0000-00-00|00:00:00,")
+
+        # Holds the data waiting to be written to the access_data.csv file, rather than writing
+        # each line of data as soon as it is ready (30 or so bytes at a time) the lines are added
+        # to this and written in one go once BUFFER_SIZE bytes have built up or an access period
+        # starts or stops, see the write_data() and flush_data() methods
+        self.write_buffer = bytearray()
+
+        # Once the write buffer is full it is swapped for a new empty one and kept here until it is
+        # written, this lets loop() leave the slow write to the file system until it has finished
+        # taking and showing the readings for this second and is about to sleep anyway, None means
+        # there is nothing waiting, see the write_pending() method
+        self.pending_buffer = None
+
+        # Button A and Button B presses waiting to be dealt with by loop(), each one is a (start,
+        # date and time) tuple where start is True for Button A and False for Button B, the button
+        # handlers only add to this so loop() is the only place the write buffers above are ever
+        # changed, see the start_stop_access() method
+        self.access_events = []
+
+        # The time (in milliseconds from the ticks_ms() clock) when the next loop() should take its
+        # readings, this moves on by exactly 1000 milliseconds each loop() so the time spent taking
+        # and showing the readings does not add up and make the seconds counted by self.count drift
+        # behind real seconds
+        self.next_wake = ticks_ms()
         
         # The self.access flag is used to control the period during which an access is being undertaken 
         # in the controlled area, Flase means there is no access at this time, True is the reverse, above
@@ -116,34 +193,46 @@ class MainApp(IoTApp):
         # matrix has no LEDs showing
         self.count = 0
 
+        # The lines of text last shown on the OLED screen, each loop() builds the lines it wants to
+        # show and only redraws the OLED screen if they are different from these, so nothing is sent
+        # to the OLED FeatherWing when the screen would look exactly the same
+        self.oled_lines = None
+
         # Use NeoPixel.fill() method sets all NeoPixels to off, uses the npm property from this
         # object instance
         self.npm.fill((0, 0, 0))
         # You must use NeoPixel.write() method when you want the matrix to change
         self.npm.write()
 
+        # The colour currently shown on the NeoPixel matrix (as one of the LED_FRAMES or OFF_FRAME),
+        # the matrix is only written to again when the colour needs to change, writing the same
+        # colour again would look no different
+        self.led_frame = OFF_FRAME
+
     def loop(self):
         """
         The loop() method is called after the init() method and is designed to contain
         the part of the program which continues to execute until the finished property
         is set to True
         """
-        # Clear the OLED screen buffer
-        self.oled_clear()
+        # Start or stop an access period for any Button A or Button B presses since the last loop()
+        if self.access_events:
+            self.start_stop_access()
+
+        # The properties used more than once below are looked up once and kept as local variables,
+        # reading a local is quicker than looking up a property on self each time
+        sensor = self.sensor_bme680
 
         # If sensor readings are available, read them once a second or so
-        if self.sensor_bme680.get_sensor_data():
-            tm_reading = self.sensor_bme680.data.temperature  # In degrees Celsius 
-            rh_reading = self.sensor_bme680.data.humidity     # As a percentage (ie. relative humidity)
+        if sensor.get_sensor_data():
+            data = sensor.data
+            tm_reading = data.temperature  # In degrees Celsius 
+            rh_reading = data.humidity     # As a percentage (ie. relative humidity)
+            access = self.access
                 
             # Current date and time taken from the real-time clock
             now = self.rtc.datetime()
-            year = now[0]
-            month = now[1]
-            day = now[2]
-            hour = now[4]
-            minute = now[5]
-            second = now[6]
+            year, month, day, _, hour, minute, second, _ = now
 
             # If there is an access period then write the current BME680 data to a single line in the
             # access_data.csv file with each sensor value as the comma separated values in the form:-
@@ -165,47 +254,60 @@ class MainApp(IoTApp):
             #
             # Finally, increment the self.count property to indicate that a further second of time has passed
             # during this access period
-            if self.access:
-                # Format timestamp
-                timestamp = "{0}-{1}-{2}|{3}:{4}:{5}".format(year, month, day, hour, minute, second)
+            if access:
+                # Fill in the timestamp for the current date and time
+                timestamp = self.fill_timestamp(year, month, day, hour, minute, second)
 
-                # Format line of data
-                data_line = "{0},{1:.2f},{2:.2f}\n".format(timestamp, tm_reading, rh_reading)
-            
-                # Write data line to the access_data.csv file
-                self.file.write(data_line)
+                # Write data line to the access_data.csv file, the sensor readings can be any number
+                # of digits long so these are still formatted each time
+                write_data = self.write_data
+                write_data(timestamp)
+                write_data(b"%.2f,%.2f\n" % (tm_reading, rh_reading))
                 
-                # Set correct colour for NeoPixel matrix LEDS and correct access warning string
-                led_colour = (0, 10, 0)  # Assume green colour
-                if self.count > 4 and self.count < 9:
-                    led_colour = (10, 7, 0)  # Set colour to orange/amber
-                elif self.count >= 9:
-                    led_colour = (10, 0, 0)  # Set colour to red
+                # Set correct colour for NeoPixel matrix LEDS, each comparison counts as 1 when it is
+                # True and 0 when it is False so adding them up gives 0 for green, 1 for orange/amber
+                # and 2 for red, which is used to pick the colour from the LED_FRAMES constant
+                count = self.count
+                led_frame = LED_FRAMES[(count > 4) + (count >= 9)]
                     
-                # Show current LEDs colour on NeoPixel matrix
-                self.npm.fill(led_colour)
-                self.npm.write()
+                # Show current LEDs colour on NeoPixel matrix, only if it is not already showing, by
+                # copying the whole frame into the NeoPixel buffer in one go
+                if led_frame is not self.led_frame:
+                    npm = self.npm
+                    npm.buf[:] = led_frame
+                    npm.write()
+                    self.led_frame = led_frame
 
                 # Increment seconds counter
-                self.count += 1
+                count += 1
+                self.count = count
                     
             # Display the current date, time, sensor readings and access information on the OLED screen, only
-            # display access information though if an access period is currently active
-            output = "{0}/{1}/{2}".format(day, month, year)
-            self.oled_text(output, 0, 0)
-            output = "{0}:{1}:{2}".format(hour, minute, second)
-            self.oled_text(output, 0, 8)
+            # display access information though if an access period is currently active, each line of text
+            # is a (text, x, y) tuple
+            date_str, time_str = self.date_time_strings(now)
+            lines = [(date_str, 0, 0), (time_str, 0, 8)]
             output = "T:{0:.2f}c H:{1:.2f}%".format(tm_reading, rh_reading)
-            self.oled_text(output, 0, 16)
-            if self.access:
-                output = "{0}: {1}".format(self.access_str, self.count)
-                self.oled_text(output, 0, 24)
+            lines.append((output, 0, 16))
+            if access:
+                output = "{0}: {1}".format(self.access_str, count)
+                lines.append((output, 0, 24))
                 
-        # Display the sensor readings on the OLED screen 
-        self.oled_display()
+            # Display the sensor readings on the OLED screen, but only if any of the lines have changed
+            # since the screen was last drawn, if there are no new sensor readings this second then the
+            # OLED screen is left showing the last ones
+            if lines != self.oled_lines:
+                self.oled_screen(lines)
+                self.oled_lines = lines
+
+        # Write any full buffer of data to the access_data.csv file now that the readings for this
+        # second have been taken and shown, the time this takes then comes out of the sleep
+        self.write_pending()
 
-        # Try to take readings and display once every second or so
-        sleep(1)
+        # Try to take readings and display once every second, sleep only for what is left of this
+        # second (or not at all if this loop() took longer than a second)
+        self.next_wake = ticks_add(self.next_wake, 1000)
+        sleep_ms(max(0, ticks_diff(self.next_wake, ticks_ms())))
     
     def deinit(self):
         """
@@ -214,31 +316,18 @@ class MainApp(IoTApp):
         properties, for instance shutting down sensor devices. It can also be used to
         display final information on output devices (such as the OLED FeatherWing)
         """
+        # If an access period is currently active then stop it, just as if Button B had been pressed,
+        # after dealing with any button presses that loop() has not yet got round to
+        self.btnB_handler(None)
+        self.start_stop_access()
+
         # Clear the NeoPixel matrix
-        self.npm.fill((0, 0, 0))
+        self.npm.buf[:] = OFF_FRAME
         self.npm.write()
+        self.led_frame = OFF_FRAME
 
-        # If an access period is currently active then write to the access_data.csv file that it
-        # is now stopped and also the length of the access period in seconds
-        if self.access:
-            # Current date and time taken from the real-time clock to record as stop date and time
-            # for this access period
-            now = self.rtc.datetime()
-            year = now[0]
-            month = now[1]
-            day = now[2]
-            hour = now[4]
-            minute = now[5]
-            second = now[6]
-            
-            date_str = "{0}/{1}/{2}".format(day, month, year)
-            time_str = "{0}:{1}:{2}".format(hour, minute, second)
-
-            # Write to file, note: self.count is approximately the number of seconds that this access
-            # period lasted
-            self.file.write("{0},{1},{2},{3}\n".format("ACCESS-STOPPED", date_str, time_str, self.count))
-
-        # Make sure the access_data.csv file is closed
+        # Make sure anything still held back is written and the access_data.csv file is closed
+        self.flush_data()
         self.file.close()
         
     def obtain_sensor_bme680(self):
@@ -259,18 +348,126 @@ class MainApp(IoTApp):
         self.sensor_bme680.set_temperature_oversample(OS_8X)
         self.sensor_bme680.set_humidity_oversample(OS_2X)
         self.sensor_bme680.set_filter(FILTER_SIZE_3)
+
+        # This specifies that you do not wish to use the VOC gas measuring sensor, only the
+        # temperature and humidity are recorded so there is no need to wait for the gas heater as
+        # part of every reading
+        self.sensor_bme680.set_gas_status(DISABLE_GAS_MEAS)
         
     def file_exists(self, file_name):
         """
         Returns True if the file (does not work with directories) with the supplied name
         exists in the current directory, otherwise returns False
         """
-        # Get the name of all files in the current directory on the Huzzah32's file system
-        # using the os.listdir() function
-        file_names = os.listdir()
-        
-        # Return True if supplied file name is in the files list, otherwise return False
-        return file_name in file_names
+        # Ask for this one file with os.stat(), an OSError means it is not on the file system
+        try:
+            mode = os.stat(file_name)[0]
+        except OSError:
+            return False
+
+        return not mode & 0x4000
+
+    def date_time_strings(self, now):
+        """
+        Returns the date (as day/month/year) and the time (as hour:minute:second) strings for the
+        supplied date and time tuple, as returned by the datetime() method of the real-time clock
+        """
+        year, month, day, _, hour, minute, second, _ = now
+        return "{0}/{1}/{2}".format(day, month, year), "{0}:{1}:{2}".format(hour, minute, second)
+
+    @micropython.native
+    def fill_timestamp(self, year, month, day, hour, minute, second):
+        """
+        Fills in the self.timestamp bytearray with the supplied date and time and returns it, every
+        field is two digits long (the year is split into two lots of two digits) so each one is
+        looked up from the DIGITS_2 constant, this is compiled to machine code rather than bytecode
+        by the @micropython.native decorator as it is run every second of an access period
+        """
+        timestamp = self.timestamp
+        timestamp[0:2] = DIGITS_2[year // 100]
+        timestamp[2:4] = DIGITS_2[year % 100]
+        timestamp[5:7] = DIGITS_2[month]
+        timestamp[8:10] = DIGITS_2[day]
+        timestamp[11:13] = DIGITS_2[hour]
+        timestamp[14:16] = DIGITS_2[minute]
+        timestamp[17:19] = DIGITS_2[second]
+        return timestamp
+
+    def write_data(self, data):
+        """
+        Adds the supplied bytes to the data waiting to be written to the access_data.csv file,
+        once at least BUFFER_SIZE bytes are waiting these are set aside to be written by the
+        write_pending() method and a new empty buffer is started
+        """
+        self.write_buffer.extend(data)
+        if len(self.write_buffer) >= BUFFER_SIZE and self.pending_buffer is None:
+            self.pending_buffer = self.write_buffer
+            self.write_buffer = bytearray()
+
+    def write_pending(self):
+        """
+        Writes the full buffer set aside by the write_data() method (if there is one) to the
+        access_data.csv file and then flushes the file
+        """
+        if self.pending_buffer is not None:
+            self.file.write(self.pending_buffer)
+            self.file.flush()
+            self.pending_buffer = None
+
+    def flush_data(self):
+        """
+        Writes all the data waiting to be written to the access_data.csv file and then flushes
+        the file so it is actually held on the Huzzah32's file system
+        """
+        self.write_pending()
+        if self.write_buffer:
+            self.file.write(self.write_buffer)
+            self.file.flush()
+            self.write_buffer = bytearray()
+
+    def start_stop_access(self):
+        """
+        Starts or stops an access period for each of the Button A and Button B presses waiting in
+        self.access_events, writing the ACCESS-STARTED or ACCESS-STOPPED line to the access_data.csv
+        file for each one (a press that would not change anything, e.g. Button A during an access
+        period, is ignored), this is only called from loop() and deinit()
+        """
+        events = self.access_events
+        changed = False
+        while events:
+            start, now = events.pop(0)
+            if start == self.access:
+                continue
+
+            # The date and time the button was pressed, to record as the start or stop date and time
+            # for this access period
+            date_str, time_str = self.date_time_strings(now)
+
+            if start:
+                # Write to file and update access information
+                self.write_data(ACCESS_STARTED)
+                self.write_data("{0},{1}\n".format(date_str, time_str).encode())
+                self.access = True
+                self.access_str = "ACCESS"
+                self.count = 0
+            else:
+                # Write to file, note: self.count is approximately the number of seconds that this
+                # access period lasted, then update access information
+                self.write_data(ACCESS_STOPPED)
+                self.write_data("{0},{1},{2}\n".format(date_str, time_str, self.count).encode())
+                self.access = False
+                self.access_str = ""
+
+                # Clear the NeoPixel matrix
+                self.npm.buf[:] = OFF_FRAME
+                self.npm.write()
+                self.led_frame = OFF_FRAME
+            changed = True
+
+        # Write the start or stop of an access period to the file straight away, so the current (or
+        # just finished) access period is kept even if the Huzzah32 loses power
+        if changed:
+            self.flush_data()
 
     def btnA_handler(self, pin):
         """
@@ -278,30 +475,10 @@ class MainApp(IoTApp):
         the inherited IoTApp class, you do not need to set up the pin used for the
         OLED FeatherWing button as this is done in the IoTApp class already for you
         """
-        # If an access period is not currently active then write to the access_data.csv file that
-        # one has started, also update access information to indicate that the access period has
-        # started
-        if not self.access:
-            # Current date and time taken from the real-time clock to record as start date and time
-            # for this access period
-            now = self.rtc.datetime()
-            year = now[0]
-            month = now[1]
-            day = now[2]
-            hour = now[4]
-            minute = now[5]
-            second = now[6]
-            
-            date_str = "{0}/{1}/{2}".format(day, month, year)
-            time_str = "{0}:{1}:{2}".format(hour, minute, second)
-
-            # Write to file
-            self.file.write("{0},{1},{2}\n".format("ACCESS-STARTED", date_str, time_str))
-        
-            # Update access information
-            self.access = True
-            self.access_str = "ACCESS"
-            self.count = 0
+        # Ask loop() to start an access period, the date and time of the press is taken from the
+        # real-time clock now but writing to the access_data.csv file is left to loop() (see the
+        # start_stop_access() method) so it can never happen part way through loop() writing data
+        self.access_events.append((True, self.rtc.datetime()))
         
     def btnB_handler(self, pin):
         """
@@ -309,34 +486,8 @@ class MainApp(IoTApp):
         the inherited IoTApp class, you do not need to set up the pin used for the
         OLED FeatherWing button as this is done in the IoTApp class already for you
         """
-        # If an access period is currently active then write to the access_data.csv file that it
-        # is now finished and also the length of the access in seconds, also update NeoPixel matrix
-        # and access information to indicate that the access period has stopped
-        if self.access:
-            # Current date and time taken from the real-time clock to record as stop date and time
-            # for this access period
-            now = self.rtc.datetime()
-            year = now[0]
-            month = now[1]
-            day = now[2]
-            hour = now[4]
-            minute = now[5]
-            second = now[6]
-            
-            date_str = "{0}/{1}/{2}".format(day, month, year)
-            time_str = "{0}:{1}:{2}".format(hour, minute, second)
-
-            # Write to file, note: self.count is approximately the number of seconds that this access
-            # period lasted
-            self.file.write("{0},{1},{2},{3}\n".format("ACCESS-STOPPED", date_str, time_str, self.count))
-        
-            # Update access information
-            self.access = False
-            self.access_str = ""
-
-            # Clear the NeoPixel matrix
-            self.npm.fill((0, 0, 0))
-            self.npm.write()
+        # Ask loop() to stop the current access period, as for btnA_handler() above
+        self.access_events.append((False, self.rtc.datetime()))
             
     def process_access_data(self):
         """
@@ -345,19 +496,39 @@ class MainApp(IoTApp):
         access_periods = []
         current_access = None
         with open("access_data.csv", "r") as file:
-            reader = csv.reader(file)
-            for row in reader:
-                event_type, timestamp, *data = row
-                timestamp = datetime.strptime(timestamp, "%Y-%m-%d|%H:%M:%S")
+            # Every line has a fixed shape (see loop(), btnA_handler() and btnB_handler()) so each
+            # one is split on its commas and the date and time fields are split on their separators,
+            # rather than using the general purpose csv.reader() and datetime.strptime()
+            #
+            # The names used for every line are looked up once and kept as local variables, as is
+            # the append() method of the readings list for the current access period, reading a
+            # local is quicker than looking up a global or an attribute each time
+            make_datetime = datetime
+            parse_date_time = self.parse_date_time
+            add_reading = None
+            for line in file:
+                fields = line.rstrip("\n").split(",")
                 
-                if event_type == "ACCESS-STARTED":
-                    current_access = {"start_time": timestamp, "readings": []}
-                elif event_type == "ACCESS-STOPPED" and current_access is not None:
-                    current_access["end_time"] = timestamp
-                    access_periods.append(current_access)
-                    current_access = None
+                if fields[0] == "ACCESS-STARTED":
+                    readings = []
+                    add_reading = readings.append
+                    current_access = {"start_time": parse_date_time(fields[1], fields[2]),
+                                      "readings": readings}
+                elif fields[0] == "ACCESS-STOPPED":
+                    if current_access is not None:
+                        current_access["end_time"] = parse_date_time(fields[1], fields[2])
+                        access_periods.append(current_access)
+                        current_access = None
                 elif current_access is not None:
-                    current_access["readings"].append((timestamp, *data))
+                    # Data line timestamp in the form YYYY-MM-DD|hh:mm:ss, files written by older
+                    # versions of this program do not zero pad the fields (e.g. 2019-3-5|9:0:5) so
+                    # the date and time are split on their separators rather than cut by position
+                    date_str, _, time_str = fields[0].partition("|")
+                    year, month, day = date_str.split("-")
+                    hour, minute, second = time_str.split(":")
+                    timestamp = make_datetime(int(year), int(month), int(day),
+                                              int(hour), int(minute), int(second))
+                    add_reading((timestamp, fields[1], fields[2]))
         
         for access in access_periods:
             duration = (access["end_time"] - access["start_time"]).total_seconds()
@@ -368,6 +539,16 @@ class MainApp(IoTApp):
             for reading in access["readings"]:
                 print("Timestamp:", reading[0], "Temperature:", reading[1], "Humidity:", reading[2])
             print()
+
+    def parse_date_time(self, date_str, time_str):
+        """
+        Returns a datetime for the date (as day/month/year) and time (as hour:minute:second)
+        strings written on the ACCESS-STARTED and ACCESS-STOPPED lines of the access_data.csv
+        file, see the date_time_strings() method
+        """
+        day, month, year = date_str.split("/")
+        hour, minute, second = time_str.split(":")
+        return datetime(int(year), int(month), int(day), int(hour), int(minute), int(second))
             
 
 # Program entrance function
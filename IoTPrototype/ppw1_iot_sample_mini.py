@@ -1,9 +1,20 @@
 import os
-from time import sleep
+import micropython
+from micropython import const
+from time import sleep_ms,ticks_add,ticks_diff,ticks_ms
 from libs.iot_app import IoTApp
-from libs.bme680 import BME680,OS_2X,OS_4X,OS_8X,FILTER_SIZE_3,ENABLE_GAS_MEAS
+from libs.bme680 import BME680,OS_2X,OS_4X,OS_8X,FILTER_SIZE_3,DISABLE_GAS_MEAS
 from neopixel import NeoPixel
 from machine import Pin
+LED_COLOURS=((0,10,0),(10,7,0),(10,0,0))
+LED_FRAMES=tuple(bytes((green,red,blue))*32 for red,green,blue in LED_COLOURS)
+OFF_FRAME=bytes(3*32)
+WARNINGS=("GREEN","AMBER","RED")
+DIGITS_2=tuple(b"%02d"%number for number in range(100))
+BUFFER_SIZE=const(4096)
+MEM_INFO_LOOPS=const(30)
+ACCESS_STARTED=b"ACCESS-STARTED\n"
+ACCESS_STOPPED=b"ACCESS-STOPPED,"
 class MainApp(IoTApp):
  def init(self):
   self.neopixel_pin=self.rig.PIN_21
@@ -14,81 +25,141 @@ class MainApp(IoTApp):
   self.file_name="access_data.csv"
   if self.file_exists(self.file_name):
    os.remove(self.file_name)
-  self.file=open(self.file_name,"w+")
+  self.file=open(self.file_name,"wb+")
+  self.timestamp=bytearray(b"0000-00-00|00:00:00,")
+  self.write_buffer=bytearray()
+  self.pending_buffer=None
+  self.access_events=[]
+  self.next_wake=ticks_ms()
+  self.loops=0
   self.access=False
   self.access_str=""
   self.warning_str=""
   self.count=0
+  self.oled_lines=None
   self.npm.fill((0,0,0))
   self.npm.write()
+  self.led_frame=OFF_FRAME
  def loop(self):
-  self.oled_clear()
-  if self.sensor_bme680.get_sensor_data():
-   tm_reading=self.sensor_bme680.data.temperature 
-   rh_reading=self.sensor_bme680.data.humidity 
-   now=self.rtc.datetime()
-   year=now[0]
-   month=now[1]
-   day=now[2]
-   hour=now[4]
-   minute=now[5]
-   second=now[6]
-   if self.access:
-    timestamp="{0}-{1}-{2}|{3}:{4}:{5}".format(year,month,day,hour,minute,second)
-    data_line="{0},{1:.2f},{2:.2f}\n".format(timestamp,tm_reading,rh_reading)
-    self.file.write(data_line)
-    led_colour=(0,10,0) 
-    if self.count>4 and self.count<10:
-     led_colour=(10,7,0) 
-     self.warning_str="AMBER" 
-    elif self.count>9:
-     led_colour=(10,0,0) 
-     self.warning_str="RED" 
-    self.npm.fill(led_colour)
-    self.npm.write()
-    self.count+=1
+  if self.access_events:
+   self.start_stop_access()
+  sensor=self.sensor_bme680
+  if sensor.get_sensor_data():
+   data=sensor.data
+   tm_reading=data.temperature 
+   rh_reading=data.humidity 
+   access=self.access
+   year,month,day,_,hour,minute,second,_=self.rtc.datetime()
+   if access:
+    write_data=self.write_data
+    write_data(self.fill_timestamp(year,month,day,hour,minute,second))
+    write_data(b"%.2f,%.2f\n"%(tm_reading,rh_reading))
+    count=self.count
+    band=(count>4)+(count>9)
+    warning_str=WARNINGS[band]
+    self.warning_str=warning_str
+    led_frame=LED_FRAMES[band]
+    if led_frame is not self.led_frame:
+     npm=self.npm
+     npm.buf[:]=led_frame
+     npm.write()
+     self.led_frame=led_frame
+    count+=1
+    self.count=count
    output="{0}/{1}/{2}".format(day,month,year)
-   self.oled_text(output,0,0)
+   lines=[(output,0,0)]
    output="{0}:{1}:{2}".format(hour,minute,second)
-   self.oled_text(output,0,8)
+   lines.append((output,0,8))
    output="T:{0:.2f}c H:{1:.2f}%".format(tm_reading,rh_reading)
-   self.oled_text(output,0,16)
-   if self.access:
-    output="{0}:{1} {2}".format(self.access_str,self.count,self.warning_str)
-    self.oled_text(output,0,24)
-  self.oled_display()
-  sleep(1)
-  import micropython
-  print(micropython.mem_info())
+   lines.append((output,0,16))
+   if access:
+    output="{0}:{1} {2}".format(self.access_str,count,warning_str)
+    lines.append((output,0,24))
+   if lines!=self.oled_lines:
+    self.oled_screen(lines)
+    self.oled_lines=lines
+  self.write_pending()
+  self.next_wake=ticks_add(self.next_wake,1000)
+  sleep_ms(max(0,ticks_diff(self.next_wake,ticks_ms())))
+  self.loops+=1
+  if self.debug_on and self.loops%MEM_INFO_LOOPS==0:
+   micropython.mem_info()
  def deinit(self):
-  self.npm.fill((0,0,0))
+  self.btnB_handler(None)
+  self.start_stop_access()
+  self.npm.buf[:]=OFF_FRAME
   self.npm.write()
-  if self.access:
-   self.file.write("{0},{1}".format("ACCESS-STOPPED",self.count))
+  self.led_frame=OFF_FRAME
+  self.flush_data()
   self.file.close()
  def obtain_sensor_bme680(self):
   self.sensor_bme680=BME680(i2c=self.rig.i2c_adapter,i2c_addr=0x76)
   self.sensor_bme680.set_temperature_oversample(OS_8X)
   self.sensor_bme680.set_humidity_oversample(OS_2X)
   self.sensor_bme680.set_filter(FILTER_SIZE_3)
+  self.sensor_bme680.set_gas_status(DISABLE_GAS_MEAS)
  def file_exists(self,file_name):
-  file_names=os.listdir()
-  return file_name in file_names
+  try:
+   mode=os.stat(file_name)[0]
+  except OSError:
+   return False
+  return not mode&0x4000
+ @micropython.native
+ def fill_timestamp(self,year,month,day,hour,minute,second):
+  timestamp=self.timestamp
+  timestamp[0:2]=DIGITS_2[year//100]
+  timestamp[2:4]=DIGITS_2[year%100]
+  timestamp[5:7]=DIGITS_2[month]
+  timestamp[8:10]=DIGITS_2[day]
+  timestamp[11:13]=DIGITS_2[hour]
+  timestamp[14:16]=DIGITS_2[minute]
+  timestamp[17:19]=DIGITS_2[second]
+  return timestamp
+ def write_data(self,data):
+  self.write_buffer.extend(data)
+  if len(self.write_buffer)>=BUFFER_SIZE and self.pending_buffer is None:
+   self.pending_buffer=self.write_buffer
+   self.write_buffer=bytearray()
+ def write_pending(self):
+  if self.pending_buffer is not None:
+   self.file.write(self.pending_buffer)
+   self.file.flush()
+   self.pending_buffer=None
+ def flush_data(self):
+  self.write_pending()
+  if self.write_buffer:
+   self.file.write(self.write_buffer)
+   self.file.flush()
+   self.write_buffer=bytearray()
+ def start_stop_access(self):
+  events=self.access_events
+  changed=False
+  while events:
+   start=events.pop(0)
+   if start==self.access:
+    continue
+   if start:
+    self.write_data(ACCESS_STARTED)
+    self.access=True
+    self.access_str="ACCESS"
+    self.warning_str="GREEN"
+    self.count=0
+   else:
+    self.write_data(ACCESS_STOPPED)
+    self.write_data(b"%d\n"%self.count)
+    self.access=False
+    self.access_str=""
+    self.warning_str=""
+    self.npm.buf[:]=OFF_FRAME
+    self.npm.write()
+    self.led_frame=OFF_FRAME
+   changed=True
+  if changed:
+   self.flush_data()
  def btnA_handler(self,pin):
-  if not self.access:
-   self.file.write("{0}\n".format("ACCESS-STARTED"))
-   self.access=True
-   self.access_str="ACCESS"
-   self.warning_str="GREEN"
-   self.count=0
+  self.access_events.append(True)
  def btnB_handler(self,pin):
-  if self.access:
-   self.file.write("{0},{1}\n".format("ACCESS-STOPPED",self.count))
-   self.access=False
-   self.access_str=""
-   self.warning_str=""
-   self.npm.fill((0,0,0))
-   self.npm.write()
+  self.access_events.append(False)
 def main():
  app=MainApp(name="PPW1 Sample",has_oled_board=True,finish_button="C",start_verbose=True)
  app.run()